@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# benchmarks/cohort_scores.py
+# Throughput of the cohort score calculator (NumPy columns, see
+# app/medical_tools/cohort.py) against calling calc_clinical_scores once per
+# patient, over synthetic rows shaped like vitals.fetch_cohort_measurements().
+# BMI, BSA and creatinine clearance are checked against the per-patient path
+# first. CPU only; no database involved.
+#
+#   python benchmarks/cohort_scores.py
+#   python benchmarks/cohort_scores.py --rows 1000 100000
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+AS_OF = date(2026, 1, 1)
+
+
+def make_rows(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Complete adult rows (the scalar tool has no notion of missing inputs)."""
+    return [
+        {
+            "patient_id": str(i),
+            "vitals_id": str(i),
+            "date_of_birth": f"{rng.randint(1930, 2000)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "sex": rng.choice(["female", "male"]),
+            "weight_kg": round(rng.uniform(40, 140), 1),
+            "height_cm": round(rng.uniform(145, 200), 1),
+            "serum_creatinine": round(rng.uniform(0.4, 4.0), 2),
+        }
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cohort vs per-patient clinical scores.")
+    parser.add_argument("--rows", type=int, nargs="*", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from app.medical_tools.cohort import ages, scores_for_rows
+    from app.medical_tools.tools import calc_clinical_scores
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(7)
+    report = []
+    for n in args.rows:
+        rows = make_rows(n, rng)
+        age = ages([r["date_of_birth"] for r in rows], AS_OF).astype(int).tolist()
+        gc.collect()
+        gc.disable()
+        started = time.perf_counter()
+        scalar = [
+            calc_clinical_scores(a, r["sex"], r["weight_kg"], r["height_cm"], r["serum_creatinine"])
+            for a, r in zip(age, rows)
+        ]
+        scalar_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cohort = scores_for_rows(rows, AS_OF)
+        cohort_s = time.perf_counter() - started
+        gc.enable()
+
+        for name, tolerance in (("bmi", 0.011), ("bsa_m2", 0.011), ("creatinine_clearance_ml_min", 0.11)):
+            for one, many in zip(scalar, cohort[name].tolist()):
+                assert abs(one[name] - many) <= tolerance, (name, one, many)
+        report.append({
+            "rows": n,
+            "scalar_per_s": round(n / scalar_s),
+            "cohort_per_s": round(n / cohort_s),
+            "speedup": round(scalar_s / cohort_s, 2),
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'rows':>8}{'scalar/s':>12}{'cohort/s':>12}{'speedup':>10}")
+    for r in report:
+        print(f"{r['rows']:>8}{r['scalar_per_s']:>12}{r['cohort_per_s']:>12}{r['speedup']:>10}")
+
+
+if __name__ == "__main__":
+    main()
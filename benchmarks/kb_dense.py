@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# benchmarks/kb_dense.py
+# Recall and latency of the dense knowledge-base tier (app/medical_tools/dense.py)
+# on precomputed synthetic embeddings: clustered unit vectors standing in for
+# chunk embeddings, queried with noisy copies of corpus rows. Recall@k is
+# measured against exact float32 brute force, for float16 and int8 storage,
+# flat scans and IVF with several nprobe values.
+#
+#   python benchmarks/kb_dense.py
+#   python benchmarks/kb_dense.py --rows 200000 --dim 256 --nprobe 4 16 64
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+
+def make_vectors(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, rows)] + 0.8 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dense KB tier: recall@k and latency.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--clusters", type=int, default=200, help="clusters in the synthetic data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[4, 16, 64])
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from app.medical_tools import artifact, dense
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = np.random.default_rng(3)
+    vectors = make_vectors(args.rows, args.dim, args.clusters, rng)
+    picks = rng.integers(0, args.rows, args.queries)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    exact = [set(np.argpartition(-(vectors @ q), args.k)[:args.k].tolist()) for q in queries]
+
+    nlist = dense.auto_nlist(args.rows, 1)
+    configs = [("float16", 0, 0), ("int8", 0, 0)]
+    configs += [(dtype, nlist, p) for dtype in ("float16", "int8") for p in args.nprobe]
+
+    report: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        built: Dict[tuple, Any] = {}
+        for dtype, lists, nprobe in configs:
+            if (dtype, lists) not in built:
+                started = time.perf_counter()
+                sections = dense.compile_sections(vectors, dtype, lists)
+                build_s = time.perf_counter() - started
+                path = os.path.join(tmp, f"{dtype}-{lists}.bin")
+                artifact.write_atomic(path, artifact.pack(0, sections, magic=b"BNCH", fmt=1))
+                mapped, _ = artifact.open_mapped(path)
+                _, views = artifact.parse(mapped, magic=b"BNCH", fmt=1)
+                built[(dtype, lists)] = (dense.DenseIndex(views), build_s, os.path.getsize(path))
+            index, build_s, size = built[(dtype, lists)]
+
+            samples, hits = [], 0
+            for q, truth in zip(queries, exact):
+                started = time.perf_counter()
+                ids, _ = index.search_vector(q, args.k, nprobe)
+                samples.append(time.perf_counter() - started)
+                hits += len(truth.intersection(ids.tolist()))
+            samples.sort()
+            report.append({
+                "dtype": dtype,
+                "ivf_lists": lists,
+                "nprobe": nprobe if lists else None,
+                "recall": round(hits / (args.k * len(queries)), 4),
+                "p50_ms": round(1000 * samples[len(samples) // 2], 3),
+                "p95_ms": round(1000 * samples[int(len(samples) * 0.95)], 3),
+                "index_mib": round(size / 2**20, 1),
+                "build_s": round(build_s, 2),
+            })
+        built.clear()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{args.rows} rows x {args.dim} dims, recall@{args.k} vs exact float32")
+    print(f"{'dtype':>8}{'lists':>7}{'nprobe':>8}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'MiB':>8}{'build s':>9}")
+    for r in report:
+        print(f"{r['dtype']:>8}{r['ivf_lists']:>7}{str(r['nprobe'] or '-'):>8}{r['recall']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['index_mib']:>8}{r['build_s']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# benchmarks/kb_search.py
+# Query latency of the mmap'd BM25 knowledge-base index (app/medical_tools/kb.py)
+# on a synthetic corpus with a Zipf-distributed vocabulary, for queries built
+# from rare, mid-frequency and very common terms. With --fts5 the same corpus
+# is also loaded into an SQLite FTS5 table and queried with bm25() ordering.
+#
+#   python benchmarks/kb_search.py
+#   python benchmarks/kb_search.py --chunks 100000 --fts5
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+
+def make_corpus(chunks: int, vocab: int, words: int, rng: np.random.Generator):
+    """Documents of 4 chunks each; word ranks follow a Zipf(1.1) law."""
+    from app.medical_tools.kb import Document
+
+    names = [f"t{i}" for i in range(vocab)]
+    ranks = np.minimum(rng.zipf(1.1, size=chunks * words), vocab) - 1
+    per_doc = 4
+    docs = []
+    for d in range(0, chunks, per_doc):
+        paragraphs = []
+        for c in range(d, min(d + per_doc, chunks)):
+            paragraphs.append(" ".join(names[r] for r in ranks[c * words:(c + 1) * words]))
+        docs.append(Document(f"doc {d // per_doc}", "synthetic", "\n\n".join(paragraphs)))
+    return docs
+
+
+def _latency(fn: Callable[[str], object], queries: List[str]) -> Dict[str, float]:
+    samples = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50_ms": round(1000 * samples[len(samples) // 2], 3),
+        "p95_ms": round(1000 * samples[int(len(samples) * 0.95)], 3),
+        "max_ms": round(1000 * samples[-1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BM25 knowledge-base query latency.")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=80, help="words per chunk")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--fts5", action="store_true", help="also time SQLite FTS5 on the same corpus")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from app.medical_tools import artifact, kb
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = np.random.default_rng(11)
+    docs = make_corpus(args.chunks, args.vocab, args.words, rng)
+    started = time.perf_counter()
+    data = kb.compile_index(1, docs, max_words=args.words, overlap=0)
+    build_s = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kb.bin")
+        artifact.write_atomic(path, data)
+        mapped, _ = artifact.open_mapped(path)
+        index = kb.KnowledgeBase(mapped)
+
+        qrng = random.Random(5)
+        # Term ranks: rare (long tail), mid and head of the distribution.
+        bands = {"rare": (2000, args.vocab), "mid": (100, 2000), "common": (0, 100)}
+        workloads = {
+            name: [" ".join(f"t{qrng.randrange(lo, hi)}" for _ in range(qrng.randint(2, 4)))
+                   for _ in range(args.queries)]
+            for name, (lo, hi) in bands.items()
+        }
+        report = {
+            "chunks": len(index),
+            "terms": len(index.terms),
+            "postings": index.stats()["postings"],
+            "index_bytes": len(data),
+            "build_s": round(build_s, 2),
+            "bm25": {name: _latency(lambda q: index.search(q, args.limit), qs) for name, qs in workloads.items()},
+        }
+
+        if args.fts5:
+            db = sqlite3.connect(os.path.join(tmp, "fts.db"))
+            db.execute("CREATE VIRTUAL TABLE chunks USING fts5(title, body)")
+            db.executemany("INSERT INTO chunks(title, body) VALUES (?, ?)",
+                           ((d.title, p) for d in docs for p in d.text.split("\n\n")))
+            db.commit()
+            sql = "SELECT rowid, bm25(chunks) FROM chunks WHERE chunks MATCH ? ORDER BY bm25(chunks) LIMIT ?"
+            report["fts5"] = {
+                name: _latency(lambda q: db.execute(sql, (" OR ".join(q.split()), args.limit)).fetchall(), qs)
+                for name, qs in workloads.items()
+            }
+            db.close()
+        del index
+        mapped.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['chunks']} chunks, {report['terms']} terms, {report['postings']} postings, "
+          f"{report['index_bytes'] / 2**20:.1f} MiB, built in {report['build_s']} s")
+    print(f"{'engine':>8}{'queries':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for engine in ("bm25", "fts5"):
+        for name, lat in report.get(engine, {}).items():
+            print(f"{engine:>8}{name:>10}{lat['p50_ms']:>10}{lat['p95_ms']:>10}{lat['max_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# benchmarks/resolver.py
+# Speed of DrugResolver.mentions (app/medical_tools/resolver.py) on free text,
+# after checking it against cases that must (typos next to a drug cue, brand
+# names) and must not (everyday words one edit from an alias) find a drug.
+# Runs against the seeded drug catalog, compiled from a throwaway SQLite
+# database unless DATABASE_PATH is set; no LLM involved.
+#
+#   python benchmarks/resolver.py
+#   python benchmarks/resolver.py --repeat 20000
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+# (text, canonical drug names expected in order)
+CASES: List[Tuple[str, List[str]]] = [
+    # "layer" is one edit from the brand "Bayer"; this once produced an
+    # aspirin + warfarin interaction the patient never asked about.
+    ("Can I take my medication warfarin together with a cream on the top layer of skin?", ["warfarin"]),
+    ("the payer and the mayer were aspiring to more", []),
+    ("Advil with Coumadin", ["ibuprofen", "warfarin"]),
+    ("Bayer aspirin every morning", ["aspirin"]),
+    ("I take aspirn 81 mg daily", ["aspirin"]),
+    ("my motrinn tablets", ["ibuprofen"]),
+    ("aspirn", []),  # a bare typo without a drug cue is not a mention
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Free-text drug mention resolution.")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="resolver-")
+    os.environ.setdefault("DATABASE_PATH", os.path.join(workdir, "medical.db"))
+    os.environ["DRUG_ARTIFACT_PATH"] = os.path.join(workdir, "drug_kb.bin")
+
+    from app import db
+    from app.medical_tools import catalog
+    from app.medical_tools.resolver import DrugResolver
+    logging.getLogger().setLevel(logging.WARNING)
+
+    async def load() -> catalog.DrugCatalog:
+        await db.init_db()
+        await db.init_pool()
+        try:
+            await catalog.refresh_catalog()
+        finally:
+            await db.close_pool()
+        return catalog.get_catalog()
+
+    resolver = DrugResolver.from_catalog(asyncio.run(load()))
+    for text, expected in CASES:
+        found = [r.name for r in resolver.mentions(text)]
+        assert found == expected, (text, found, expected)
+
+    print(f"{'case':<44}{'us':>10}")
+    for text, _ in CASES:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            resolver.mentions(text)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"{text[:42]:<44}{elapsed * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
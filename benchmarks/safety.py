@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# benchmarks/safety.py
+# Speed of the whole-regimen safety check (app/medical_tools/safety.py),
+# after checking it against regimens whose findings are known: allergies
+# named by brand or misspelled must flag the drug itself, class allergies
+# must go through cross-reactivity, and entries with a dose ("ibuprofen 400
+# mg") are checked like bare drug names. Runs against the seeded drug catalog,
+# compiled from a throwaway SQLite database unless DATABASE_PATH is set.
+#
+#   python benchmarks/safety.py
+#   python benchmarks/safety.py --repeat 20000
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+# (medications, allergies, conditions, expected (kind, severity, drugs) in order)
+Finding = Tuple[str, str, Tuple[str, ...]]
+CASES: List[Tuple[List[str], List[str], List[str], List[Finding]]] = [
+    (["ibuprofen"], ["Advil"], [], [("allergy", "contraindicated", ("ibuprofen",))]),
+    (["ibuprofen"], ["ibuprofin"], [], [("allergy", "contraindicated", ("ibuprofen",))]),
+    (["Motrin"], ["ibuprofen"], [], [("allergy", "contraindicated", ("ibuprofen",))]),
+    (["ibuprofen"], ["nsaid"], [], [("allergy", "major", ("ibuprofen",))]),
+    (["warfarin"], ["Advil"], [], []),
+    # Entries with a dose are checked like bare names.
+    (["lisinopril 10 mg daily", "ibuprofen 400 mg"], [], ["GI bleed"], [
+        ("condition", "major", ("ibuprofen",)),
+        ("interaction", "moderate", ("ibuprofen", "lisinopril")),
+    ]),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Whole-regimen medication safety check.")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="safety-")
+    os.environ.setdefault("DATABASE_PATH", os.path.join(workdir, "medical.db"))
+    os.environ["DRUG_ARTIFACT_PATH"] = os.path.join(workdir, "drug_kb.bin")
+
+    from app import db
+    from app.medical_tools import catalog
+    from app.medical_tools.safety import evaluate_regimen
+    from app.medical_tools.tools import get_drug_contraindications
+    logging.getLogger().setLevel(logging.WARNING)
+
+    async def load() -> catalog.DrugCatalog:
+        await db.init_db()
+        await db.init_pool()
+        try:
+            await catalog.refresh_catalog()
+        finally:
+            await db.close_pool()
+        return catalog.get_catalog()
+
+    snapshot = asyncio.run(load())
+    for meds, allergies, conditions, expected in CASES:
+        result = evaluate_regimen(meds, allergies=allergies, conditions=conditions, catalog=snapshot)
+        found = [(f["kind"], f["severity"], tuple(f["drugs"])) for f in result["findings"]]
+        assert found == expected, (meds, allergies, conditions, found, expected)
+    assert get_drug_contraindications("ibuprofen", ["Advil"])["reasons"], "brand-name allergy missed"
+    unknown = evaluate_regimen(["ibuprofen 400 mg", "vitamin water"], catalog=snapshot)["unrecognized"]
+    assert unknown == ["vitamin water"], unknown
+
+    print(f"{'case':<44}{'us':>10}")
+    for meds, allergies, conditions, _ in CASES:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            evaluate_regimen(meds, allergies=allergies, conditions=conditions, catalog=snapshot)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        label = " + ".join(meds) + " / " + ", ".join(allergies + conditions)
+        print(f"{label[:42]:<44}{elapsed * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# benchmarks/triage_batch.py
+# Throughput of TriageEngine.triage_batch (NumPy matrix evaluation, see
+# app/medical_tools/triage.py) against calling TriageEngine.triage once per
+# patient, for the shipped rule set and for rule sets padded with synthetic
+# rules. Every batch result is checked against the per-patient path first.
+# CPU only; no LLM involved.
+#
+#   python benchmarks/triage_batch.py
+#   python benchmarks/triage_batch.py --cases 100 1000 10000 --extra-rules 0 500 2000
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hf-deployment" / "gateway"))
+
+
+def padded_spec(spec: Dict[str, Any], extra: int, rng: random.Random) -> Dict[str, Any]:
+    """`spec` plus `extra` random rules over the same vocabulary."""
+    names = list(spec["symptoms"])
+    rules = list(spec["rules"])
+    for i in range(extra):
+        rule: Dict[str, Any] = {"id": f"synthetic_{i}", "acuity": rng.choice(["routine", "urgent", "emergent"]),
+                                "advice": "synthetic", "all": rng.sample(names, rng.randint(1, 3))}
+        if rng.random() < 0.3:
+            rule["any"] = rng.sample(names, 2)
+        if rng.random() < 0.2:
+            rule["none"] = rng.sample(names, 1)
+        if rng.random() < 0.1:
+            rule["min_age"] = rng.randint(18, 70)
+        rules.append(rule)
+    return {**spec, "rules": rules}
+
+
+def make_cases(spec: Dict[str, Any], n: int, rng: random.Random) -> List[tuple]:
+    vocabulary = [s for name, syns in spec["symptoms"].items() for s in (name, *syns)]
+    return [
+        (rng.sample(vocabulary, rng.randint(0, 5)),
+         rng.choice([None, rng.randint(1, 95)]),
+         rng.choice([None, "female", "male"]))
+        for _ in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch vs per-patient rule-based triage.")
+    parser.add_argument("--cases", type=int, nargs="*", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--extra-rules", type=int, nargs="*", default=[0, 500])
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from app.medical_tools.triage import DEFAULT_RULES_PATH, TriageEngine
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    rng = random.Random(7)
+    report = []
+    for extra in args.extra_rules:
+        spec = padded_spec(base, extra, rng)
+        engine = TriageEngine(spec)
+        for n in args.cases:
+            cases = make_cases(spec, n, rng)
+            engine.triage_batch(cases[:10])  # build the rule matrices outside the timing
+            gc.collect()
+            gc.disable()  # as timeit does: keep collector pauses out of either path
+            started = time.perf_counter()
+            scalar = [engine.triage(*case) for case in cases]
+            scalar_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            batch = engine.triage_batch(cases)
+            batch_s = time.perf_counter() - started
+            gc.enable()
+
+            for one, many in zip(scalar, batch):
+                assert (one["rules_matched"][:1] or [None])[0] == many["rule"], (one, many)
+                assert one["acuity"] == many["acuity"], (one, many)
+            report.append({
+                "rules": len(engine.rules),
+                "cases": n,
+                "scalar_per_s": round(n / scalar_s),
+                "batch_per_s": round(n / batch_s),
+                "speedup": round(scalar_s / batch_s, 2),
+            })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'rules':>7}{'cases':>8}{'scalar/s':>12}{'batch/s':>12}{'speedup':>10}")
+    for r in report:
+        print(f"{r['rules']:>7}{r['cases']:>8}{r['scalar_per_s']:>12}{r['batch_per_s']:>12}{r['speedup']:>10}")
+
+
+if __name__ == "__main__":
+    main()
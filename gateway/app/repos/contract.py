@@ -0,0 +1,107 @@
+# repos/contract.py — repository contract shared by both gateway backends
+#
+# This file is identical in gateway/app/repos (Postgres, psycopg) and
+# hf-deployment/gateway/app/repos (SQLite, aiosqlite). Each backend implements
+# the protocols as plain modules (repos/users.py, ...) with SQL suited to its
+# engine; repos/__init__.py bundles them into a `Repository` named `backend`.
+#
+# Ids are returned as strings; other row values keep the driver's native types.
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol
+
+Row = Dict[str, Any]
+
+
+class UserRepo(Protocol):
+    async def create_user(
+        self,
+        *,
+        email: str,
+        password_hash: str,
+        password_algo: str = "argon2id",
+        display_name: Optional[str] = None,
+        phone: Optional[str] = None,
+    ) -> Optional[Row]: ...
+
+    async def get_user_by_email(self, email: str) -> Optional[Row]: ...
+
+    async def get_user_by_id(self, user_id: str) -> Optional[Row]: ...
+
+    async def insert_session(
+        self,
+        *,
+        user_id: str,
+        token_hash: str,
+        expires_at: datetime,
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> Row: ...
+
+    async def get_session_by_token_hash(self, token_hash: str) -> Optional[Row]: ...
+
+    async def delete_session_by_token_hash(self, token_hash: str) -> None: ...
+
+    async def update_password_hash(self, user_id: str, new_hash: str, algo: str = "argon2id") -> None: ...
+
+    async def revoke_all_sessions_for_user(self, user_id: str) -> None: ...
+
+
+class PatientRepo(Protocol):
+    async def get_patient_id_for_user(self, user_id: str) -> Optional[str]: ...
+
+    async def fetch_profile_by_patient_id(self, patient_id: str) -> Optional[Row]: ...
+
+    async def update_patient_by_id(self, patient_id: str, payload: Any) -> None: ...
+
+    async def create_patient_and_link(self, user_id: str, payload: Any) -> str: ...
+
+
+class EncounterRepo(Protocol):
+    async def create_or_get_open_encounter(self, patient_id: str, chief_complaint: str) -> str: ...
+
+    async def insert_patient_note(
+        self,
+        *,
+        encounter_id: str,
+        author_user_id: str,
+        content: str,
+        data: Dict[str, Any],
+    ) -> str: ...
+
+    async def fetch_latest_patient_intake_for_patient(self, patient_id: str) -> Optional[Row]: ...
+
+
+class VitalsRepo(Protocol):
+    async def list_vitals(self, patient_id: str, limit: int = 50) -> List[Row]: ...
+
+    async def add_vital(
+        self,
+        patient_id: str,
+        *,
+        timestamp_utc: str,
+        systolic_mmhg: Optional[int] = None,
+        diastolic_mmhg: Optional[int] = None,
+        heart_rate_bpm: Optional[int] = None,
+        resp_rate_min: Optional[int] = None,
+        temperature_c: Optional[float] = None,
+        spo2_percent: Optional[float] = None,
+        weight_kg: Optional[float] = None,
+        height_cm: Optional[float] = None,
+        bmi: Optional[float] = None,
+        serum_creatinine: Optional[float] = None,
+        egfr_ml_min_1_73m2: Optional[float] = None,
+    ) -> str: ...
+
+
+@dataclass(frozen=True)
+class Repository:
+    """One backend's implementation of every repository protocol."""
+
+    name: str
+    users: UserRepo
+    patients: PatientRepo
+    encounters: EncounterRepo
+    vitals: VitalsRepo
@@ -30,46 +30,26 @@ def _hash_token(raw: str) -> str:
 
 
 async def _insert_reset_token(user_id: str, token_hash: str, expires_at: datetime) -> None:
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            "INSERT INTO password_resets (user_id, token_hash, expires_at) VALUES (?, ?, ?)",
-            (user_id, token_hash, expires_at.isoformat()),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await db.execute_write(
+        "INSERT INTO password_resets (user_id, token_hash, expires_at) VALUES (?, ?, ?)",
+        (user_id, token_hash, expires_at.isoformat()),
+    )
 
 
 async def _consume_reset_token(token_hash: str) -> Optional[dict[str, Any]]:
-    conn = await db.get_conn()
-    try:
-        cursor = await conn.execute(
-            """
-            SELECT id, user_id FROM password_resets
-            WHERE token_hash = ?
-              AND used_at IS NULL
-              AND expires_at > datetime('now')
-            LIMIT 1
-            """,
-            (token_hash,),
-        )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-
-        row_dict = dict(row)
-        reset_id = row_dict["id"]
-        user_id = row_dict["user_id"]
-
-        await conn.execute(
-            "UPDATE password_resets SET used_at = datetime('now') WHERE id = ?",
-            (reset_id,),
-        )
-        await conn.commit()
-        return {"id": reset_id, "user_id": str(user_id)}
-    finally:
-        await conn.close()
+    rows = await db.execute_returning(
+        """
+        UPDATE password_resets SET used_at = datetime('now')
+        WHERE token_hash = ?
+          AND used_at IS NULL
+          AND expires_at > datetime('now')
+        RETURNING id, user_id
+        """,
+        (token_hash,),
+    )
+    if not rows:
+        return None
+    return {"id": rows[0]["id"], "user_id": str(rows[0]["user_id"])}
 
 
 async def request_password_reset(email: Union[str, EmailStr]) -> None:
@@ -1,31 +1,29 @@
 # gateway/app/chat/agent.py — LangGraph medical agent with HuggingFace LLM
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
-from typing import Any, Dict, List, Optional, TypedDict
+import time
+import uuid
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, TypedDict
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 
 from ..config import settings
-from ..medical_tools.tools import TOOL_REGISTRY, triage_symptoms
+from ..medical_tools.resolver import get_resolver
+from ..medical_tools.tools import TOOL_REGISTRY
+from ..telemetry import metrics
+from . import llm, policy
+from .breaker import CircuitOpenError
+from .cache import cache_key, response_cache, scope_key, ttl_for
+from .singleflight import Emit, llm_flights
 
 log = logging.getLogger("gateway.agent")
 
-# HuggingFace Inference Client (lazy init)
-_hf_client = None
-
-
-def _get_hf_client():
-    global _hf_client
-    if _hf_client is None:
-        from huggingface_hub import InferenceClient
-        token = settings.hf_token or None
-        _hf_client = InferenceClient(token=token)
-    return _hf_client
-
-
 # ---------------------------------------------------------------------------
 # Agent State
 # ---------------------------------------------------------------------------
@@ -38,6 +36,9 @@ class AgentState(TypedDict):
     tool_result: Optional[Dict[str, Any]]
     llm_response: str
     final_response: Dict[str, Any]
+    started_at: float
+    first_advice_ms: Optional[float]
+    narrative: str
 
 
 # ---------------------------------------------------------------------------
@@ -111,6 +112,7 @@ def execute_tool(state: AgentState) -> AgentState:
     tool_name = state.get("tool_name", "triageSymptoms")
     msg = state.get("user_message", "")
     args = state.get("args") or {}
+    drugs = _drug_names(msg)
 
     try:
         tool_fn = TOOL_REGISTRY.get(tool_name)
@@ -131,19 +133,18 @@ def execute_tool(state: AgentState) -> AgentState:
 
         elif tool_name == "getDrugInfo":
             # Extract drug name from message
-            drug = _extract_drug_name(msg) or args.get("name", msg)
+            drug = drugs[0] if drugs else args.get("name", msg)
             state["tool_result"] = tool_fn(drug)
 
         elif tool_name == "getDrugInteractions":
-            drugs = args.get("drugs", _extract_drug_names(msg))
-            state["tool_result"] = tool_fn(drugs)
+            state["tool_result"] = tool_fn(args.get("drugs", drugs or [msg]))
 
         elif tool_name == "getDrugAlternatives":
-            drug = _extract_drug_name(msg) or args.get("drug", msg)
+            drug = drugs[0] if drugs else args.get("drug", msg)
             state["tool_result"] = tool_fn(drug)
 
         elif tool_name == "getDrugContraindications":
-            drug = _extract_drug_name(msg) or args.get("drug", msg)
+            drug = drugs[0] if drugs else args.get("drug", msg)
             allergies = args.get("allergies", [])
             state["tool_result"] = tool_fn(drug, allergies)
 
@@ -176,66 +177,148 @@ def execute_tool(state: AgentState) -> AgentState:
     return state
 
 
-def generate_response(state: AgentState) -> AgentState:
-    """Generate a natural language response using HuggingFace LLM."""
+async def generate_response(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Generate a natural language response using HuggingFace LLM.
+
+    When the run was started by stream_agent, tokens are pushed to its event
+    queue as they arrive. Identical prompts in flight at the same time share
+    one LLM call (chat/singleflight.py).
+    """
     tool_result = state.get("tool_result", {})
     user_message = state.get("user_message", "")
+    intent = state.get("intent", "general")
+    sink: Optional[asyncio.Queue] = (config.get("configurable") or {}).get("event_sink")
+
+    scope = None
+    if ttl_for(intent) > 0 and not (isinstance(tool_result, dict) and tool_result.get("error")):
+        scope = scope_key(settings.hf_model_id, MEDICAL_SYSTEM_PROMPT, intent, tool_result)
+        cached = await response_cache.get(intent, scope, user_message)
+        if cached is not None:
+            state["llm_response"] = cached
+            policy.first_advice(state)
+            if sink is not None:
+                await sink.put({"event": "token", "data": {"text": cached}})
+            state["final_response"] = _final_response(state, cached=True)
+            return state
+    else:
+        response_cache.bypass(intent)
 
-    # Try to get LLM response
-    try:
-        client = _get_hf_client()
-        prompt = f"""Tool results: {json.dumps(tool_result, default=str)}
+    prompt = f"""Tool results: {json.dumps(tool_result, default=str)}
 
 Patient's message: {user_message}
 
 Provide a clear, empathetic response based on the tool results. Include specific medical information from the results."""
+    messages = [
+        {"role": "system", "content": MEDICAL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+    async def call_llm(emit: Emit) -> str:
+        # Runs once per flight, whichever caller started it.
+        if sink is None:
+            text = await llm.chat_completion(messages, max_tokens=512, temperature=0.3)
+        else:
+            parts: List[str] = []
+            async with aclosing(llm.stream_completion(messages, max_tokens=512, temperature=0.3)) as tokens:
+                async for delta in tokens:
+                    parts.append(delta)
+                    emit(delta)
+            text = "".join(parts)
+        if scope is not None:
+            await response_cache.put(intent, scope, user_message, text)
+        return text
+
+    async def forward(text: str) -> None:
+        policy.first_advice(state)
+        await sink.put({"event": "token", "data": {"text": text}})
 
-        response = client.chat_completion(
-            model=settings.hf_model_id,
-            messages=[
-                {"role": "system", "content": MEDICAL_SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=512,
-            temperature=0.3,
+    try:
+        state["llm_response"] = await llm_flights.run(
+            _flight_key(intent, tool_result, user_message),
+            call_llm,
+            on_text=forward if sink is not None else None,
+            deadline=settings.llm_deadline_seconds,
         )
-        llm_text = response.choices[0].message.content
-        state["llm_response"] = llm_text
-
+    except CircuitOpenError:
+        state["llm_response"] = _format_tool_result_fallback(tool_result, intent)
     except Exception as e:
-        log.warning("LLM call failed (using tool results directly): %s", e)
-        state["llm_response"] = _format_tool_result_fallback(tool_result, state.get("intent", "general"))
+        log.warning("LLM call failed (using tool results directly): %r", e)
+        state["llm_response"] = _format_tool_result_fallback(tool_result, intent)
+
+    policy.first_advice(state)
+    state["final_response"] = _final_response(state)
+    return state
+
+
+async def deterministic_response(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Answer from the tool result alone, for turns the bypass policy selects."""
+    sink: Optional[asyncio.Queue] = (config.get("configurable") or {}).get("event_sink")
+    tool_result = state.get("tool_result") or {}
+    intent = state.get("intent", "general")
+    state["llm_response"] = _format_tool_result_fallback(tool_result, intent)
+    policy.first_advice(state)
+    metrics.incr("chat.bypassed")
+    if sink is not None:
+        await sink.put({"event": "token", "data": {"text": state["llm_response"]}})
+    state["final_response"] = _final_response(state, bypassed=policy.bypass_reason(intent, tool_result))
+    return state
+
+
+class _Renamed:
+    """Event sink adapter that forwards token events under another name."""
+
+    def __init__(self, sink: asyncio.Queue, event: str) -> None:
+        self.sink = sink
+        self.event = event
+
+    async def put(self, item: Dict[str, Any]) -> None:
+        await self.sink.put({**item, "event": self.event})
+
+
+async def narrate(state: AgentState, config: RunnableConfig) -> AgentState:
+    """LLM narrative for a bypassed turn, streamed after its done event."""
+    sink = (config.get("configurable") or {}).get("event_sink")
+    enriched = await generate_response(
+        dict(state), {"configurable": {"event_sink": _Renamed(sink, "narrative_token")}}
+    )
+    # An LLM failure falls back to the same template the patient already has.
+    narrative = enriched["llm_response"]
+    state["narrative"] = "" if narrative == state.get("llm_response") else narrative
+    return state
 
-    state["final_response"] = {
+
+def _final_response(state: AgentState, cached: bool = False, bypassed: Optional[str] = None) -> Dict[str, Any]:
+    response = {
         "ok": True,
         "tool": state.get("tool_name", ""),
-        "result": tool_result,
+        "result": state.get("tool_result", {}),
         "message": state.get("llm_response", ""),
         "intent": state.get("intent", "general"),
     }
-    return state
+    if cached:
+        response["cached"] = True
+    if bypassed:
+        response["bypassed"] = bypassed
+    if state.get("first_advice_ms") is not None:
+        response["first_advice_ms"] = state["first_advice_ms"]
+    return response
 
 
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 
-KNOWN_DRUGS = ["ibuprofen", "warfarin", "lisinopril", "aspirin", "acetaminophen",
-               "losartan", "amlodipine", "metformin", "omeprazole", "penicillin"]
-
-
-def _extract_drug_name(text: str) -> Optional[str]:
-    text_lower = text.lower()
-    for drug in KNOWN_DRUGS:
-        if drug in text_lower:
-            return drug
-    return None
+def _drug_names(message: str) -> List[str]:
+    """Canonical names of the drugs mentioned in `message`, in order."""
+    return [r.name for r in get_resolver().mentions(message)]
 
 
-def _extract_drug_names(text: str) -> List[str]:
-    text_lower = text.lower()
-    found = [drug for drug in KNOWN_DRUGS if drug in text_lower]
-    return found if found else [text]
+def _flight_key(intent: str, tool_result: Any, user_message: str) -> str:
+    """The response-cache key of this prompt, or a key of its own when coalescing is off."""
+    if not settings.chat_coalesce:
+        return uuid.uuid4().hex
+    scope = scope_key(settings.hf_model_id, MEDICAL_SYSTEM_PROMPT, intent, tool_result)
+    return cache_key(scope, user_message)
 
 
 def _format_tool_result_fallback(result: Dict[str, Any], intent: str) -> str:
@@ -279,17 +362,32 @@ def _format_tool_result_fallback(result: Dict[str, Any], intent: str) -> str:
 # Build LangGraph
 # ---------------------------------------------------------------------------
 
+def _route_response(state: AgentState) -> str:
+    if policy.bypass_reason(state.get("intent", "general"), state.get("tool_result")) is not None:
+        return "deterministic_response"
+    return "generate_response"
+
+
+def _route_narrative(state: AgentState, config: RunnableConfig) -> str:
+    streaming = (config.get("configurable") or {}).get("event_sink") is not None
+    return "narrate" if streaming and settings.chat_bypass_narrative else END
+
+
 def _build_graph():
     graph = StateGraph(AgentState)
 
     graph.add_node("classify", classify_intent)
     graph.add_node("execute_tool", execute_tool)
     graph.add_node("generate_response", generate_response)
+    graph.add_node("deterministic_response", deterministic_response)
+    graph.add_node("narrate", narrate)
 
     graph.set_entry_point("classify")
     graph.add_edge("classify", "execute_tool")
-    graph.add_edge("execute_tool", "generate_response")
+    graph.add_conditional_edges("execute_tool", _route_response, ["generate_response", "deterministic_response"])
     graph.add_edge("generate_response", END)
+    graph.add_conditional_edges("deterministic_response", _route_narrative, ["narrate", END])
+    graph.add_edge("narrate", END)
 
     return graph.compile()
 
@@ -305,11 +403,8 @@ def get_agent():
     return _agent
 
 
-async def run_agent(message: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Run the LangGraph medical agent and return the response."""
-    agent = get_agent()
-
-    initial_state: AgentState = {
+def _initial_state(message: str, args: Optional[Dict[str, Any]]) -> AgentState:
+    return {
         "user_message": message or "",
         "args": args or {},
         "intent": "",
@@ -317,7 +412,76 @@ async def run_agent(message: str, args: Optional[Dict[str, Any]] = None) -> Dict
         "tool_result": None,
         "llm_response": "",
         "final_response": {},
+        "started_at": time.perf_counter(),
+        "first_advice_ms": None,
+        "narrative": "",
     }
 
-    result = await agent.ainvoke(initial_state)
+
+async def run_agent(message: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run the LangGraph medical agent and return the response."""
+    agent = get_agent()
+    result = await agent.ainvoke(_initial_state(message, args))
     return result.get("final_response", {"ok": False, "error": "Agent failed"})
+
+
+def _update_event(node: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if node == "classify":
+        return {"event": "classify", "data": {"intent": state.get("intent"), "tool": state.get("tool_name")}}
+    if node == "execute_tool":
+        return {"event": "tool", "data": {"tool": state.get("tool_name"), "result": state.get("tool_result")}}
+    if node in ("generate_response", "deterministic_response"):
+        return {"event": "done", "data": state.get("final_response")}
+    if node == "narrate" and state.get("narrative"):
+        return {"event": "narrative", "data": {"message": state["narrative"]}}
+    return None
+
+
+async def stream_agent(
+    message: str,
+    args: Optional[Dict[str, Any]] = None,
+    heartbeat: Optional[float] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run the agent, yielding classify/tool events, LLM tokens and the final response.
+
+    Events share one bounded queue, so a slow consumer throttles its own run
+    (the LLM stream itself is read by a task shared with identical requests).
+    A {"event": "ping"} is yielded after `heartbeat` idle seconds. Closing the
+    generator cancels the graph run, which closes the upstream LLM stream.
+    """
+    events: asyncio.Queue = asyncio.Queue(maxsize=settings.chat_stream_buffer)
+    finished = object()
+
+    async def pump() -> None:
+        try:
+            async for update in get_agent().astream(
+                _initial_state(message, args),
+                config={"configurable": {"event_sink": events}},
+                stream_mode="updates",
+            ):
+                for node, state in update.items():
+                    event = _update_event(node, state)
+                    if event is not None:
+                        await events.put(event)
+        except Exception as e:
+            log.exception("Streaming agent run failed")
+            await events.put({"event": "error", "data": {"ok": False, "error": str(e)}})
+        # Not in a `finally`: a cancelled run means the consumer has gone, and
+        # with nobody draining a full queue the put would never return.
+        await events.put(finished)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield {"event": "ping"}
+                continue
+            if event is finished:
+                break
+            yield event
+    finally:
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
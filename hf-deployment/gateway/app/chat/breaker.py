@@ -0,0 +1,173 @@
+# gateway/app/chat/breaker.py — circuit breaker for the LLM backend
+#
+# When the inference endpoint degrades, every request would otherwise wait
+# for the full deadline before falling back to the tool-result template. The
+# breaker keeps the outcomes of the most recent calls; once enough of them
+# failed or were slower than `slow_seconds` it opens, and calls are rejected
+# at once with CircuitOpenError (the agent then answers from the tool result).
+# After `open_seconds` it lets `probes` calls through (half-open): a success
+# closes it again, a failure reopens it for another period.
+#
+#   closed --(failure rate >= threshold)--> open --(open_seconds)--> half_open
+#   half_open --(probe succeeds)--> closed;  half_open --(probe fails)--> open
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from ..telemetry import metrics
+
+log = logging.getLogger("gateway.llm.breaker")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The LLM backend is considered down; the call was not attempted."""
+
+
+class Call:
+    """Handle for one guarded call; set `latency` to judge it by something
+    other than its total duration (e.g. time to first token)."""
+
+    __slots__ = ("started", "latency")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.latency: Optional[float] = None
+
+
+class CircuitBreaker:
+    """Failure/slow-call rate breaker over a sliding window of call outcomes.
+
+    Every allow() that returns must be paired with one success(), failure()
+    or abandon() (a call that ended without telling us anything, e.g. it was
+    cancelled), so half-open probes are always released; guard() does the
+    pairing.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_seconds: float,
+        open_seconds: float,
+        probes: int = 1,
+        enabled: bool = True,
+    ) -> None:
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.enabled = enabled
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = failed or slow
+        self._probing = 0
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the backend now."""
+        if not self.enabled or self.state == CLOSED:
+            return
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            log.info("LLM circuit half-open: probing the backend")
+        if self.state == HALF_OPEN and self._probing < self.probes:
+            self._probing += 1
+            return
+        self.rejected += 1
+        metrics.incr("llm.breaker_rejected")
+        raise CircuitOpenError(f"LLM circuit {self.state}; answering without the model")
+
+    @contextmanager
+    def guard(self) -> Iterator[Call]:
+        """allow() on entry; success, failure or abandon by how the block exits.
+
+        A timeout counts as a failure only after `slow_seconds`: a call whose
+        deadline was mostly spent waiting for a slot says nothing about the
+        backend.
+        """
+        self.allow()
+        call = Call()
+        try:
+            yield call
+        except (asyncio.CancelledError, GeneratorExit):
+            self.abandon()
+            raise
+        except asyncio.TimeoutError:
+            if time.monotonic() - call.started >= self.slow_seconds:
+                self.failure()
+            else:
+                self.abandon()
+            raise
+        except Exception:
+            self.failure()
+            raise
+        self.success(call.latency if call.latency is not None else time.monotonic() - call.started)
+
+    def success(self, seconds: float) -> None:
+        if seconds >= self.slow_seconds:
+            self._record(failed=True)
+            return
+        if self.state == HALF_OPEN:
+            self._probing = max(self._probing - 1, 0)
+            self._close()
+            return
+        self._record(failed=False)
+
+    def failure(self) -> None:
+        self._record(failed=True)
+
+    def abandon(self) -> None:
+        if self.state == HALF_OPEN:
+            self._probing = max(self._probing - 1, 0)
+
+    def _record(self, failed: bool) -> None:
+        if self.state == HALF_OPEN:
+            self._probing = max(self._probing - 1, 0)
+            if failed:
+                self._open()
+            return
+        if self.state == OPEN:  # a call that started before the breaker opened
+            return
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and self.error_rate() >= self.failure_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._outcomes.clear()
+        metrics.incr("llm.breaker_opened")
+        log.warning("LLM circuit open for %.0fs: backend failing or slow", self.open_seconds)
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        log.info("LLM circuit closed: backend recovered")
+
+    def error_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "error_rate": round(self.error_rate(), 3),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+        if self.state != CLOSED:
+            out["open_for_s"] = round(time.monotonic() - self.opened_at, 1)
+        return out
@@ -0,0 +1,201 @@
+# gateway/app/chat/cache.py — LLM response cache for the agent
+#
+# Keyed on sha256(model, system prompt, intent, canonical tool result,
+# normalized message): the same question over the same tool output gets the
+# same answer without another inference call. Entries live in an in-memory LRU
+# and, optionally, the llm_response_cache table so every worker shares them.
+# TTLs are per intent; triage and anything patient-specific is never cached.
+# Below the exact tiers, chat/semantic.py matches paraphrases within the same
+# scope (everything in the key except the message).
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .. import db
+from ..config import settings
+from .semantic import SemanticIndex
+
+log = logging.getLogger("gateway.chat.cache")
+
+# Seconds to keep a response, by intent. Intents missing here are not cached.
+DEFAULT_TTLS: Dict[str, int] = {
+    "drug_info": 24 * 3600,
+    "drug_interaction": 24 * 3600,
+    "drug_alternatives": 24 * 3600,
+    "drug_contraindications": 24 * 3600,
+    "clinical_calc": 3600,
+    "general": 3600,
+}
+# Never cached, whatever settings.chat_cache_ttls says.
+NEVER_CACHE = frozenset({"triage", "scheduling", "patient_info"})
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    text = unicodedata.normalize("NFKC", message or "").lower()
+    return _SPACES.sub(" ", text).strip(" ?!.")
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+# Tool-result fields that only echo the user's message back; the message is
+# already part of the exact key, and keeping them in the scope would stop
+# paraphrases from ever sharing one.
+ECHO_FIELDS = frozenset({"query"})
+
+
+def scope_key(model: str, system_prompt: str, intent: str, tool_result: Any) -> str:
+    if isinstance(tool_result, dict):
+        tool_result = {k: v for k, v in tool_result.items() if k not in ECHO_FIELDS}
+    parts = (model, system_prompt, intent, canonical_json(tool_result))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_key(scope: str, message: str) -> str:
+    return hashlib.sha256(f"{scope}\x1f{normalize_message(message)}".encode("utf-8")).hexdigest()
+
+
+def ttl_for(intent: str) -> int:
+    if intent in NEVER_CACHE:
+        return 0
+    return int(settings.chat_cache_ttls.get(intent, DEFAULT_TTLS.get(intent, 0)))
+
+
+class ResponseCache:
+    """In-memory LRU over an optional shared SQLite tier, with per-intent counters.
+
+    Lookups fall through memory -> SQLite -> semantic index (if configured).
+    """
+
+    def __init__(self, max_size: int, persistent: bool, semantic: Optional[SemanticIndex] = None) -> None:
+        self.max_size = max_size
+        self.persistent = persistent
+        self.semantic = semantic
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def _count(self, intent: str, outcome: str) -> None:
+        counts = self._counts.setdefault(intent, {
+            "hits": 0, "shared_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "bypassed": 0,
+        })
+        counts[outcome] += 1
+
+    def _remember(self, key: str, expires_at: float, response: str) -> None:
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def bypass(self, intent: str) -> None:
+        """Record a turn that was not eligible for caching."""
+        self._count(intent, "bypassed")
+
+    async def get(self, intent: str, scope: str, message: str) -> Optional[str]:
+        key = cache_key(scope, message)
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(intent, "hits")
+                return entry[1]
+            del self._entries[key]
+
+        if self.persistent:
+            try:
+                async with db.connection() as conn:
+                    cursor = await conn.execute(
+                        "SELECT response, expires_at FROM llm_response_cache "
+                        "WHERE cache_key = ? AND expires_at > ?",
+                        (key, now),
+                    )
+                    row = await cursor.fetchone()
+            except Exception:
+                log.exception("LLM cache lookup failed")
+                row = None
+            if row is not None:
+                self._remember(key, row["expires_at"], row["response"])
+                self._count(intent, "shared_hits")
+                return row["response"]
+
+        if self.semantic is not None:
+            response = self.semantic.lookup(scope, normalize_message(message))
+            if response is not None:
+                self._count(intent, "semantic_hits")
+                return response
+
+        self._count(intent, "misses")
+        return None
+
+    async def put(self, intent: str, scope: str, message: str, response: str) -> None:
+        ttl = ttl_for(intent)
+        if ttl <= 0 or not response:
+            return
+        key = cache_key(scope, message)
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, response)
+        self._count(intent, "stores")
+        if self.semantic is not None:
+            self.semantic.add(scope, normalize_message(message), response, ttl)
+        if self.persistent:
+            try:
+                await db.execute_write(
+                    """
+                    INSERT INTO llm_response_cache (cache_key, intent, response, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (cache_key) DO UPDATE
+                      SET response = excluded.response, expires_at = excluded.expires_at
+                    """,
+                    (key, intent, response, expires_at),
+                )
+            except Exception:
+                log.exception("LLM cache store failed")
+
+    def stats(self) -> Dict[str, Any]:
+        by_intent = {}
+        for intent, c in self._counts.items():
+            served = c["hits"] + c["shared_hits"] + c["semantic_hits"]
+            lookups = served + c["misses"]
+            by_intent[intent] = {
+                **c,
+                "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+            }
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "persistent": self.persistent,
+            "evictions": self.evictions,
+            "semantic": self.semantic.stats() if self.semantic is not None else None,
+            "by_intent": by_intent,
+        }
+
+
+response_cache = ResponseCache(
+    settings.chat_cache_size,
+    settings.chat_cache_persistent,
+    SemanticIndex(
+        settings.chat_semantic_capacity,
+        settings.chat_semantic_dim,
+        settings.chat_semantic_threshold,
+        quantize=settings.chat_semantic_int8,
+    ) if settings.chat_semantic_cache else None,
+)
+
+
+async def purge_expired() -> int:
+    """Delete expired rows from the shared tier; returns the number removed."""
+    return await db.execute_write(
+        "DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),)
+    )
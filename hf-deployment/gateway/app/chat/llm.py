@@ -0,0 +1,229 @@
+# gateway/app/chat/llm.py — bounded, async access to HuggingFace Inference
+#
+# All LLM calls go through one AsyncInferenceClient and a per-process
+# semaphore (llm_max_concurrency). Each call has a deadline covering both the
+# wait for a slot and the inference itself; queue-wait and inference times are
+# recorded in telemetry.metrics under "llm.*". stream_completion holds its slot
+# until the token stream is exhausted or closed, so an abandoned stream frees
+# capacity as soon as its consumer goes away.
+#
+# Calls also pass through a circuit breaker (chat/breaker.py): while the
+# backend is failing or slow they are rejected at once, so the agent answers
+# from the tool result instead of waiting out the deadline. The breaker only
+# judges the backend: a call enters it once it holds a slot, so queue wait
+# and slot timeouts (our own saturation) never count as failures or slow calls.
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..config import settings
+from ..telemetry import metrics
+from .breaker import CircuitBreaker
+
+log = logging.getLogger("gateway.llm")
+
+Messages = List[Dict[str, str]]
+
+_client = None
+_slots: Optional[asyncio.Semaphore] = None
+_waiting = 0
+_in_flight = 0
+_completed = metrics.LatencyStat()  # successful completions only; drives the hedge delay
+
+breaker = CircuitBreaker(
+    enabled=settings.llm_breaker_enabled,
+    window=settings.llm_breaker_window,
+    min_calls=settings.llm_breaker_min_calls,
+    failure_rate=settings.llm_breaker_failure_rate,
+    slow_seconds=settings.llm_breaker_slow_seconds,
+    open_seconds=settings.llm_breaker_open_seconds,
+    probes=settings.llm_breaker_probes,
+)
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from huggingface_hub import AsyncInferenceClient
+        _client = AsyncInferenceClient(
+            token=settings.hf_token or None,
+            timeout=settings.llm_deadline_seconds,
+        )
+    return _client
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.llm_max_concurrency)
+    return _slots
+
+
+@asynccontextmanager
+async def _slot(deadline: float) -> AsyncIterator[float]:
+    """Hold an inference slot; yields the seconds left of `deadline`."""
+    global _waiting, _in_flight
+    slots = _get_slots()
+    started = time.perf_counter()
+    _waiting += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=deadline)
+    except asyncio.TimeoutError:
+        metrics.incr("llm.queue_timeouts")
+        raise
+    finally:
+        _waiting -= 1
+    waited = time.perf_counter() - started
+    metrics.observe("llm.queue_wait", waited)
+    _in_flight += 1
+    try:
+        yield max(deadline - waited, 0.001)
+    finally:
+        _in_flight -= 1
+        slots.release()
+
+
+async def _complete(messages: Messages, max_tokens: int, temperature: float, deadline: float) -> str:
+    async with _slot(deadline) as remaining:
+        with breaker.guard():
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    _get_client().chat_completion(
+                        messages,
+                        model=settings.hf_model_id,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    ),
+                    timeout=remaining,
+                )
+            except asyncio.TimeoutError:
+                metrics.incr("llm.timeouts")
+                raise
+            except Exception:
+                metrics.incr("llm.errors")
+                raise
+            finally:
+                metrics.observe("llm.inference", time.perf_counter() - started)
+            _completed.observe(time.perf_counter() - started)
+    metrics.incr("llm.completions")
+    return response.choices[0].message.content
+
+
+def _hedge_delay() -> Optional[float]:
+    """Seconds to wait before hedging: the recent p95 completion time, once known."""
+    if not settings.llm_hedge or _completed.count < settings.llm_hedge_min_samples:
+        return None
+    return max(_completed.snapshot()["p95_ms"] / 1000, settings.llm_hedge_min_delay_seconds)
+
+
+async def chat_completion(
+    messages: Messages,
+    *,
+    max_tokens: int = 512,
+    temperature: float = 0.3,
+    deadline: Optional[float] = None,
+) -> str:
+    """Complete `messages` with the configured model.
+
+    Raises TimeoutError past the deadline, and CircuitOpenError without
+    calling the backend while the breaker is open. With llm_hedge, a second
+    request goes out when the first has not answered within the recent p95
+    (and a slot is free); the first answer wins and the other is cancelled.
+    """
+    deadline = deadline or settings.llm_deadline_seconds
+    delay = _hedge_delay()
+    if delay is None or delay >= deadline:
+        return await _complete(messages, max_tokens, temperature, deadline)
+
+    first = asyncio.ensure_future(_complete(messages, max_tokens, temperature, deadline))
+    attempts = [first]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if done or _get_slots().locked():  # answered, or no spare capacity to hedge with
+            return await first
+        metrics.incr("llm.hedged")
+        attempts.append(asyncio.ensure_future(_complete(messages, max_tokens, temperature, deadline - delay)))
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        metrics.incr("llm.hedge_wins")
+                    return task.result()
+        return await first  # both failed: raise the original error
+    finally:
+        for task in attempts:
+            task.cancel()
+
+
+async def stream_completion(
+    messages: Messages,
+    *,
+    max_tokens: int = 512,
+    temperature: float = 0.3,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """Yield completion text deltas; use with contextlib.aclosing() so cancellation closes the stream."""
+    async with _slot(deadline or settings.llm_deadline_seconds) as remaining:
+        with breaker.guard() as call:
+            started = time.perf_counter()
+            give_up = started + remaining
+            stream = None
+            try:
+                stream = await asyncio.wait_for(
+                    _get_client().chat_completion(
+                        messages,
+                        model=settings.hf_model_id,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stream=True,
+                    ),
+                    timeout=remaining,
+                )
+                chunks = stream.__aiter__()
+                first = True
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(
+                            chunks.__anext__(), timeout=max(give_up - time.perf_counter(), 0.001)
+                        )
+                    except StopAsyncIteration:
+                        break
+                    if first:
+                        call.latency = time.perf_counter() - started
+                        metrics.observe("llm.first_token", call.latency)
+                        first = False
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            except asyncio.TimeoutError:
+                metrics.incr("llm.timeouts")
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                metrics.incr("llm.cancelled")
+                raise
+            except Exception:
+                metrics.incr("llm.errors")
+                raise
+            finally:
+                metrics.observe("llm.inference", time.perf_counter() - started)
+                if stream is not None and hasattr(stream, "aclose"):
+                    await stream.aclose()
+        metrics.incr("llm.completions")
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "max_concurrency": settings.llm_max_concurrency,
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+        "circuit_breaker": breaker.stats(),
+        "hedge_delay_s": _hedge_delay(),
+        **metrics.snapshot("llm."),
+    }
@@ -0,0 +1,60 @@
+# gateway/app/chat/policy.py — which turns are answered without the LLM
+#
+# Some answers must not wait for a completion: an emergent triage result has
+# to tell the patient to call emergency services now. Intents whose template
+# already says everything needed (drug_interaction) can be added through
+# chat_bypass_intents; that is off by default, because a bypassed answer goes
+# out without the LLM to notice a misread drug mention.
+#
+# After execute_tool the graph asks bypass_reason(); a reason routes the turn
+# to the deterministic node, which answers from the tool result straight
+# away. With chat_bypass_narrative, a streaming client then also gets an LLM
+# narrative after its done event.
+#
+# Every turn records the time from its start to its first advice (the
+# deterministic answer, a cached answer, the first streamed token or the full
+# completion) under "chat.first_advice.<acuity or intent>".
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from ..config import settings
+from ..telemetry import metrics
+
+
+def bypass_reason(intent: str, tool_result: Any) -> Optional[str]:
+    """Why this turn skips the LLM ("intent:..." / "acuity:..."), or None."""
+    if not isinstance(tool_result, dict) or tool_result.get("error"):
+        return None
+    if intent in settings.chat_bypass_intents:
+        return f"intent:{intent}"
+    acuity = tool_result.get("acuity")
+    if intent == "triage" and acuity in settings.chat_bypass_acuities:
+        return f"acuity:{acuity}"
+    return None
+
+
+def advice_class(intent: str, tool_result: Any) -> str:
+    """Triage turns by acuity, everything else by intent."""
+    if intent == "triage" and isinstance(tool_result, dict) and tool_result.get("acuity"):
+        return str(tool_result["acuity"])
+    return intent or "general"
+
+
+def first_advice(state: Dict[str, Any]) -> None:
+    """Record time-to-first-advice for this turn, once; kept in state as ms."""
+    if state.get("first_advice_ms") is not None or not state.get("started_at"):
+        return
+    seconds = time.perf_counter() - state["started_at"]
+    state["first_advice_ms"] = round(1000 * seconds, 3)
+    metrics.observe(f"chat.first_advice.{advice_class(state.get('intent', ''), state.get('tool_result'))}", seconds)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "bypass_intents": list(settings.chat_bypass_intents),
+        "bypass_acuities": list(settings.chat_bypass_acuities),
+        "narrative": settings.chat_bypass_narrative,
+        **metrics.snapshot("chat."),
+    }
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+import json
+import logging
+from contextlib import aclosing
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from ..config import settings
 from ..deps import get_current_user
 from ..models.me import ChatSendIn
-from .agent import run_agent
+from .agent import run_agent, stream_agent
+
+log = logging.getLogger("gateway.chat")
 
 router = APIRouter()
 
@@ -18,3 +28,40 @@ async def chat_send(payload: ChatSendIn, user=Depends(get_current_user)):
 
     result = await run_agent(message=message, args=args)
     return result
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(payload: ChatSendIn, request: Request, user=Depends(get_current_user)):
+    """Server-sent events: classify, tool, token* and finally done (or error).
+
+    A turn answered by the bypass policy (chat/policy.py) may continue after
+    done with narrative_token* and narrative when chat_bypass_narrative is on.
+    """
+    args = payload.args or {}
+    message = payload.message or ""
+
+    if message:
+        args.setdefault("query", message)
+
+    async def events():
+        stream = stream_agent(message, args, heartbeat=settings.chat_stream_heartbeat_seconds)
+        async with aclosing(stream):
+            async for event in stream:
+                if event["event"] == "ping":
+                    # Idle: notice clients that went away while the LLM is still queued.
+                    if await request.is_disconnected():
+                        log.info("Chat stream client disconnected; cancelling generation")
+                        return
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
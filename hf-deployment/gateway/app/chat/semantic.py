@@ -0,0 +1,185 @@
+# gateway/app/chat/semantic.py — nearest-neighbour tier of the LLM response cache
+#
+# Exact keys miss paraphrases ("ibuprofen side effects" / "what are the side
+# effects of ibuprofen?"). Messages are embedded locally with a signed hashing
+# vectorizer over character n-grams and words — no model, no downloads — and
+# kept in one preallocated NumPy matrix. A lookup is a single matrix-vector
+# product over the rows of the same scope (model + prompt + intent + tool
+# result), so a paraphrase only ever reuses an answer built from the same data.
+#
+# Similar wording is not the same question: "can I take ibuprofen" and "can I
+# not take ibuprofen" score 0.87, "max dose per day" and "max dose per hour"
+# 0.81. Before any vector is compared, a message is reduced to its guard
+# terms (negations, numbers, units and the ids of the drugs it names), and
+# those must match exactly: they are part of the row's scope. Brand names are
+# replaced by the generic name before vectorizing, so "advil" and "ibuprofen"
+# are the same word. The tier is off by default (settings.chat_semantic_cache).
+from __future__ import annotations
+
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..medical_tools.resolver import get_resolver
+
+_INT8_SCALE = 127
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Function words carry no meaning for matching and dominate short questions.
+STOP_WORDS = frozenset(
+    "a about an and are can could do does for how i in is it me my of on or "
+    "please should tell the to what whats when which with would you".split()
+)
+
+
+# Words that change what is being asked although they barely move the vector.
+NEGATIONS = frozenset(
+    "no not never none nor without cannot cant dont doesnt didnt isnt arent "
+    "shouldnt wont avoid stop".split()
+)
+UNITS = frozenset(
+    "mg mcg g kg lb lbs ml l iu unit units percent tablet tablets pill pills "
+    "capsule capsules drop drops puff puffs second seconds minute minutes hour "
+    "hours hr hrs day days daily week weeks weekly month months year years once "
+    "twice hourly nightly half double one two three four five six seven eight "
+    "nine ten".split()
+)
+
+
+def guarded(text: str) -> Tuple[str, str]:
+    """(`text` with brand names replaced by generic names, its guard terms).
+
+    Two messages may only share an answer when their guard strings are equal.
+    """
+    text = text.replace("\u2019", "'")
+    canonical, drug_ids = get_resolver().canonicalize(text)
+    terms = sorted(
+        w for w in _WORD.findall(text)
+        if w.replace("'", "") in NEGATIONS or w.endswith("n't") or w in UNITS or any(c.isdigit() for c in w)
+    )
+    return canonical, " ".join(terms) + "|" + ",".join(map(str, drug_ids))
+
+
+class HashingVectorizer:
+    """L2-normalised signed feature hashing of char n-grams and words."""
+
+    def __init__(self, dim: int = 2048, ngrams: tuple = (3, 4)) -> None:
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def features(self, text: str) -> List[str]:
+        """`text` is expected to be normalised already (see cache.normalize_message)."""
+        words = [w for w in text.split() if w not in STOP_WORDS] or text.split()
+        padded = f" {' '.join(words)} "
+        grams = [padded[i:i + n] for n in self.ngrams for i in range(len(padded) - n + 1)]
+        grams.extend(f"w:{word}" for word in words)
+        return grams
+
+    def transform(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in self.features(text)), dtype=np.uint32
+        )
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if hashes.size:
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(vec, hashes % self.dim, signs)
+            norm = float(np.linalg.norm(vec))
+            if norm:
+                vec /= norm
+        return vec
+
+
+class SemanticIndex:
+    """Fixed-capacity vector store with per-scope cosine top-1 lookup.
+
+    When full, an expired row is reused first, otherwise the least recently
+    used one. With quantize=True rows are stored as int8 (4x less memory).
+    """
+
+    def __init__(self, capacity: int, dim: int, threshold: float, quantize: bool = False) -> None:
+        self.capacity = capacity
+        self.threshold = threshold
+        self.quantize = quantize
+        self.vectorizer = HashingVectorizer(dim)
+        # Feature-major (dim x capacity): a sparse query reads only its own rows.
+        self._vectors = np.zeros((dim, capacity), dtype=np.int8 if quantize else np.float32)
+        self._scopes = np.full(capacity, -1, dtype=np.int64)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._used = np.zeros(capacity, dtype=np.float64)
+        self._responses: List[Optional[str]] = [None] * capacity
+        self._scope_ids: Dict[str, int] = {}
+        self._next_scope = 0
+        self._size = 0
+        self.evictions = 0
+
+    def _scope_id(self, scope: str, create: bool) -> Optional[int]:
+        sid = self._scope_ids.get(scope)
+        if sid is None and create:
+            if len(self._scope_ids) >= 2 * self.capacity:
+                live = set(self._scopes[: self._size].tolist())
+                self._scope_ids = {s: i for s, i in self._scope_ids.items() if i in live}
+            sid = self._scope_ids[scope] = self._next_scope
+            self._next_scope += 1
+        return sid
+
+    def _encode(self, text: str) -> np.ndarray:
+        vec = self.vectorizer.transform(text)
+        if self.quantize:
+            return np.rint(vec * _INT8_SCALE).astype(np.int8)
+        return vec
+
+    def lookup(self, scope: str, text: str) -> Optional[str]:
+        text, guard = guarded(text)
+        sid = self._scope_id(f"{scope}\x1f{guard}", create=False)
+        if sid is None:
+            return None
+        now = time.time()
+        n = self._size
+        live = (self._scopes[:n] == sid) & (self._expires[:n] > now)
+        if not live.any():
+            return None
+        # Hashed query vectors are sparse (a few dozen features), so only those
+        # columns take part in the dot product; works the same for int8 rows.
+        query = self._encode(text)
+        cols = np.flatnonzero(query)
+        block = self._vectors[cols, :n]
+        if self.quantize:
+            sims = (query[cols].astype(np.float32) @ block.astype(np.float32)) / float(_INT8_SCALE ** 2)
+        else:
+            sims = query[cols] @ block
+        sims = np.where(live, sims, -np.inf)
+        row = int(np.argmax(sims))
+        if sims[row] < self.threshold:
+            return None
+        self._used[row] = now
+        return self._responses[row]
+
+    def add(self, scope: str, text: str, response: str, ttl: float) -> None:
+        text, guard = guarded(text)
+        now = time.time()
+        if self._size < self.capacity:
+            row = self._size
+            self._size += 1
+        else:
+            expired = np.flatnonzero(self._expires <= now)
+            row = int(expired[0]) if expired.size else int(np.argmin(self._used))
+            self.evictions += 1
+        self._vectors[:, row] = self._encode(text)
+        self._scopes[row] = self._scope_id(f"{scope}\x1f{guard}", create=True)
+        self._expires[row] = now + ttl
+        self._used[row] = now
+        self._responses[row] = response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "dim": self.vectorizer.dim,
+            "threshold": self.threshold,
+            "int8": self.quantize,
+            "matrix_bytes": int(self._vectors.nbytes),
+            "evictions": self.evictions,
+        }
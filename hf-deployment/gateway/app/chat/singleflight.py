@@ -0,0 +1,136 @@
+# gateway/app/chat/singleflight.py — one upstream LLM call per identical in-flight prompt
+#
+# When one question circulates widely, identical requests arrive within
+# seconds of each other — before the first answer has reached the response
+# cache. Calls are keyed on the cache's prompt hash (chat/cache.py cache_key):
+# the first caller starts the upstream call as a task, and every identical
+# caller that arrives while it runs subscribes to that task instead of
+# starting another.
+#
+# The task appends text to its flight as it arrives, so a streaming
+# subscriber gets the tokens produced so far and then follows along; other
+# subscribers get the whole text at the end. An upstream error is raised in
+# every subscriber. Each subscriber waits at most its own deadline, and the
+# task is cancelled once its last subscriber has gone, and its key released
+# at once so a later identical call starts a new task rather than joining one
+# that is being cancelled. Otherwise the key is released when the task
+# finishes, after the work function has stored the answer in the cache.
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..telemetry import metrics
+
+log = logging.getLogger("gateway.chat.singleflight")
+
+Emit = Callable[[str], None]
+Work = Callable[[Emit], Awaitable[str]]
+OnText = Callable[[str], Awaitable[None]]
+
+
+class Flight:
+    """One running upstream call and the text it has produced so far."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.parts: List[str] = []
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def emit(self, text: str) -> None:
+        self.parts.append(text)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Waiters hold the old event; a fresh one is armed for the next change.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one task."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: str,
+        work: Work,
+        *,
+        on_text: Optional[OnText] = None,
+        deadline: float,
+    ) -> str:
+        """Result of `work` for `key`, started here or shared with a call already running.
+
+        `work` receives an emit(text) callback for partial output; `on_text`
+        is awaited with each part as this caller receives it. Raises
+        asyncio.TimeoutError after `deadline` seconds, or whatever the shared
+        call raised.
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done() or flight.task.cancelling():
+            # A flight on its way out would only hand this caller its
+            # CancelledError; start a fresh one in its place.
+            flight = self._start(key, work)
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            metrics.incr("llm.coalesced")
+        flight.subscribers += 1
+        try:
+            return await self._follow(flight, on_text, time.monotonic() + deadline)
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.task.done():
+                log.debug("Cancelling abandoned LLM call %s", key[:12])
+                # Released now, not when the task gets round to finishing, so
+                # the next identical call starts afresh instead of joining it.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def _start(self, key: str, work: Work) -> Flight:
+        flight = self._flights[key] = Flight(key)
+        flight.task = asyncio.create_task(work(flight.emit))
+
+        def finished(task: asyncio.Task) -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight._wake()
+            if not task.cancelled():
+                task.exception()  # retrieved here so an unawaited failure is not logged twice
+
+        flight.task.add_done_callback(finished)
+        return flight
+
+    async def _follow(self, flight: Flight, on_text: Optional[OnText], give_up: float) -> str:
+        if on_text is None:
+            await asyncio.wait_for(asyncio.shield(flight.task), max(give_up - time.monotonic(), 0.001))
+            return flight.task.result()
+        sent = 0
+        while True:
+            changed = flight._changed
+            while sent < len(flight.parts):
+                await on_text(flight.parts[sent])
+                sent += 1
+            if flight.task.done():
+                return flight.task.result()
+            await asyncio.wait_for(changed.wait(), max(give_up - time.monotonic(), 0.001))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "subscribers": sum(f.subscribers for f in self._flights.values()),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+llm_flights = SingleFlight()
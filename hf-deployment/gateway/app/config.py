@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import json
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
@@ -16,6 +16,45 @@ class Settings(BaseSettings):
 
     # ---------------- Database (SQLite) ----------------
     database_path: str = "/app/data/medical.db"
+    sqlite_pool_size: int = 4
+    sqlite_cache_size_kib: int = 16 * 1024
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_write_window_ms: float = 2.0  # group-commit window for queued writes
+    sqlite_write_max_batch: int = 64
+    sqlite_maintenance_interval_seconds: int = 60
+    sqlite_wal_checkpoint_bytes: int = 64 * 1024 * 1024
+    sqlite_optimize_interval_seconds: int = 3600
+    sqlite_analysis_limit: int = 400
+    sqlite_vacuum_step_pages: int = 256
+
+    # ---------------- Drug catalog (compiled mmap artifact) ----------------
+    drug_artifact_path: str = "/app/data/drug_kb.bin"
+    drug_catalog_refresh_seconds: int = 30
+    drug_monograph_cache_size: int = 512
+    drug_monograph_warm_count: int = 50
+
+    # ---------------- Triage rules ----------------
+    triage_rules_path: str = ""  # empty: app/medical_tools/triage_rules.json
+    triage_rules_check_seconds: float = 5.0  # how often the rules file is checked for changes
+    triage_batch_max_cases: int = 10000  # per /triage/batch request
+
+    # ---------------- Knowledge base (BM25 index, mmap artifact) ----------------
+    kb_source_dir: str = ""  # empty: app/medical_tools/kb_docs
+    kb_index_path: str = "/app/data/medical_kb.bin"
+    kb_chunk_words: int = 120
+    kb_chunk_overlap_words: int = 20
+    kb_bm25_k1: float = 1.2
+    kb_bm25_b: float = 0.75
+    kb_search_mode: str = "hybrid"  # bm25 | dense | hybrid
+    kb_dense_dim: int = 512  # 0 disables the dense tier
+    kb_dense_dtype: str = "int8"  # or "float16" (exact to ~1e-3, but 2x the size and slower to widen)
+    kb_dense_ivf_min_chunks: int = 20000  # cluster the dense rows (IVF) from this many chunks; 0 never
+    kb_dense_nprobe: int = 16  # IVF clusters scanned per query
+    kb_dense_min_score: float = 0.12  # cosine floor for dense hits
+    kb_hybrid_dense_only_min_score: float = 0.3  # hybrid: cosine floor for chunks BM25 did not find
+    kb_fusion_rrf_k: int = 60
+    kb_fusion_dense_weight: float = 0.5  # dense share of the fused rank score (BM25 counts 1.0)
 
     # ---------------- CORS / Frontend ----------------
     allowed_origins: List[str] = ["*"]
@@ -31,6 +70,32 @@ class Settings(BaseSettings):
     # ---------------- HuggingFace Inference ----------------
     hf_token: Optional[str] = os.environ.get("HF_TOKEN", "")
     hf_model_id: str = "mistralai/Mistral-7B-Instruct-v0.3"
+    llm_max_concurrency: int = 8       # in-flight inference calls per worker
+    llm_deadline_seconds: float = 45.0  # slot wait + inference, per call
+    llm_breaker_enabled: bool = True   # fail fast to the tool-result answer while the LLM is down, see chat/breaker.py
+    llm_breaker_window: int = 20       # most recent calls the failure rate is taken over
+    llm_breaker_min_calls: int = 5
+    llm_breaker_failure_rate: float = 0.5  # share of failed or slow calls that opens the breaker
+    llm_breaker_slow_seconds: float = 20.0  # a completion (or first streamed token) slower than this counts as failed
+    llm_breaker_open_seconds: float = 30.0  # before a half-open probe
+    llm_breaker_probes: int = 1
+    llm_hedge: bool = False            # second request after the recent p95 if the first has not answered
+    llm_hedge_min_samples: int = 20
+    llm_hedge_min_delay_seconds: float = 1.0
+    chat_stream_buffer: int = 64       # queued SSE events before the agent run is paused
+    chat_stream_heartbeat_seconds: float = 10.0
+    chat_cache_size: int = 1024
+    chat_cache_persistent: bool = True  # share cached responses via the llm_response_cache table
+    chat_cache_ttls: Dict[str, int] = {}  # per-intent TTL overrides (JSON), see chat/cache.py
+    chat_semantic_cache: bool = False  # reuse answers to paraphrased questions (opt-in), see chat/semantic.py
+    chat_semantic_capacity: int = 2048
+    chat_semantic_dim: int = 2048
+    chat_semantic_threshold: float = 0.85  # minimum cosine similarity to reuse an answer
+    chat_semantic_int8: bool = False
+    chat_bypass_intents: List[str] = []  # answered from the tool result alone (opt-in, e.g. ["drug_interaction"]), see chat/policy.py
+    chat_bypass_acuities: List[str] = ["emergent"]  # triage acuities answered without waiting for the LLM
+    chat_bypass_narrative: bool = False  # stream an LLM narrative after a bypassed answer (SSE only)
+    chat_coalesce: bool = True         # identical concurrent prompts share one LLM call, see chat/singleflight.py
 
     # ---------------- Frontend base URL ----------------
     frontend_base_url: str = ""
@@ -1,10 +1,14 @@
 # gateway/app/db.py — SQLite async database layer
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple, TypeVar
 
 import aiosqlite
 
@@ -12,28 +16,399 @@ from .config import settings
 
 log = logging.getLogger("gateway.db")
 
+T = TypeVar("T")
+WriteJob = Callable[[aiosqlite.Connection], Awaitable[T]]
+
 _DB_PATH: str = settings.database_path
 
+# RETURNING and the ON CONFLICT DO NOTHING upsert form used by the repos.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
 
 def _schema_path() -> str:
     return os.path.join(os.path.dirname(__file__), "schema.sql")
 
 
+def _pragmas() -> List[str]:
+    return [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size_bytes}",
+        "PRAGMA temp_store = MEMORY",
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+    ]
+
+
+def check_sqlite_version() -> None:
+    """Fail fast if the linked SQLite library predates RETURNING support."""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise RuntimeError(
+            f"SQLite {sqlite3.sqlite_version} is too old; "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))}+ is required (RETURNING)"
+        )
+
+
+async def _migrate(db: aiosqlite.Connection) -> None:
+    """Bring databases created by older schema.sql versions up to date."""
+    cursor = await db.execute("PRAGMA table_info(vitals)")
+    vitals_cols = {row[1] for row in await cursor.fetchall()}
+    if vitals_cols:
+        # Column names follow the Postgres schema (repos/contract.py parity).
+        if "timestamp" in vitals_cols:
+            await db.execute("ALTER TABLE vitals RENAME COLUMN timestamp TO timestamp_utc")
+        if "egfr" in vitals_cols:
+            await db.execute("ALTER TABLE vitals RENAME COLUMN egfr TO egfr_ml_min_1_73m2")
+        if "serum_creatinine" not in vitals_cols:
+            await db.execute("ALTER TABLE vitals ADD COLUMN serum_creatinine REAL")
+
+
 async def init_db() -> None:
     """Create tables if they don't exist."""
+    check_sqlite_version()
     os.makedirs(os.path.dirname(_DB_PATH), exist_ok=True)
     schema_sql = Path(_schema_path()).read_text()
     async with aiosqlite.connect(_DB_PATH) as db:
+        # Only takes effect on a fresh file; existing databases keep their mode.
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("PRAGMA journal_mode = WAL")
+        await _migrate(db)
         await db.executescript(schema_sql)
         await db.commit()
     log.info("SQLite database initialized at %s", _DB_PATH)
 
 
-async def get_conn() -> aiosqlite.Connection:
-    """Get a new database connection with dict-like row factory."""
-    conn = await aiosqlite.connect(_DB_PATH)
-    conn.row_factory = aiosqlite.Row
-    return conn
+class ConnectionPool:
+    """Fixed-size pool of long-lived aiosqlite connections (one thread each)."""
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._all: List[aiosqlite.Connection] = []
+        self._waiting = 0
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.reconnects = 0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = aiosqlite.Row
+        for pragma in _pragmas():
+            await conn.execute(pragma)
+        self._all.append(conn)
+        return conn
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._connect())
+
+    async def close(self) -> None:
+        for conn in self._all:
+            await conn.close()
+        self._all.clear()
+        self._idle = asyncio.Queue()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            conn = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        self.wait_seconds += time.perf_counter() - started
+        self.checkouts += 1
+        return conn
+
+    async def release(self, conn: aiosqlite.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except Exception:
+            # Broken connection: replace it rather than handing it out again.
+            log.exception("Discarding broken SQLite connection")
+            self._all.remove(conn)
+            try:
+                await conn.close()
+            except Exception:
+                pass
+            conn = await self._connect()
+            self.reconnects += 1
+        self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    def stats(self) -> Dict[str, float]:
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "idle": idle,
+            "in_use": len(self._all) - idle,
+            "waiting": self._waiting,
+            "checkouts": self.checkouts,
+            "avg_wait_ms": round(1000 * self.wait_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+            "reconnects": self.reconnects,
+        }
+
+
+class WriteQueue:
+    """Single writer per process: queued jobs are group-committed in one transaction.
+
+    Each job is an async callable taking the writer connection. Jobs run in
+    submission order inside `BEGIN IMMEDIATE`, each under its own SAVEPOINT so a
+    failing job is rolled back alone; the batch then commits once and every
+    caller's future is resolved. Jobs must not commit themselves.
+
+    Exclusive jobs (checkpoints, vacuum) run alone between batches with no
+    transaction open, so they never interleave with queued writes.
+    """
+
+    def __init__(self, path: str, window_ms: float, max_batch: int) -> None:
+        self.path = path
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[Tuple[WriteJob, asyncio.Future, bool]] = asyncio.Queue()
+        self._conn: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self.jobs = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.commit_seconds = 0.0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        # Autocommit mode: the writer issues BEGIN/COMMIT itself.
+        conn = await aiosqlite.connect(self.path, isolation_level=None)
+        conn.row_factory = aiosqlite.Row
+        for pragma in _pragmas():
+            await conn.execute(pragma)
+        return conn
+
+    async def open(self) -> None:
+        self._conn = await self._connect()
+        self._task = asyncio.create_task(self._run(), name="sqlite-writer")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while not self._queue.empty():
+            _, fut, _ = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("DB writer closed"))
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def submit(self, job: WriteJob[T], exclusive: bool = False) -> T:
+        if self._task is None:
+            raise RuntimeError("DB writer not running")
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, fut, exclusive))
+        return await fut
+
+    async def _run(self) -> None:
+        held = None
+        while True:
+            item = held or await self._queue.get()
+            held = None
+            batch = [item]
+            try:
+                if self._conn is None:  # lost after a failed rollback
+                    self._conn = await self._connect()
+                if item[2]:
+                    await self._run_exclusive(item[0], item[1])
+                    continue
+                if self.window:
+                    await asyncio.sleep(self.window)
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    nxt = self._queue.get_nowait()
+                    if nxt[2]:
+                        held = nxt
+                        break
+                    batch.append(nxt)
+                await self._commit_batch(batch)
+            except asyncio.CancelledError:
+                for _, fut, _ in batch + ([held] if held else []):
+                    if not fut.done():
+                        fut.set_exception(RuntimeError("DB writer closed"))
+                raise
+            except Exception as exc:
+                # The writer must outlive any one batch, or every later write hangs.
+                log.exception("SQLite writer failed on a batch of %d", len(batch))
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+
+    async def _run_exclusive(self, job: WriteJob, fut: asyncio.Future) -> None:
+        if fut.done():
+            return
+        try:
+            result = await job(self._conn)
+        except Exception as exc:
+            if not fut.done():
+                fut.set_exception(exc)
+        else:
+            if not fut.done():
+                fut.set_result(result)
+
+    async def _commit_batch(self, batch: List[Tuple[WriteJob, asyncio.Future, bool]]) -> None:
+        conn = self._conn
+        assert conn is not None
+        started = time.perf_counter()
+        results: List[Tuple[asyncio.Future, Any, BaseException | None]] = []
+        failure: BaseException = RuntimeError("DB write batch aborted")
+        committed = False
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for job, fut, _ in batch:
+                if fut.done():  # caller went away before we got to it
+                    continue
+                await conn.execute("SAVEPOINT job")
+                try:
+                    result = await job(conn)
+                except Exception as exc:
+                    await conn.execute("ROLLBACK TO job")
+                    results.append((fut, None, exc))
+                else:
+                    results.append((fut, result, None))
+                await conn.execute("RELEASE job")
+            await conn.execute("COMMIT")
+            committed = True
+        except Exception as exc:
+            failure = exc
+            log.exception("SQLite write batch of %d failed", len(batch))
+            self.failed_batches += 1
+            await self._rollback(conn)
+            return
+        finally:
+            # Every caller hears back, whatever happened above.
+            if not committed:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(failure)
+        self.commit_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.jobs += len(results)
+        for fut, result, exc in results:
+            if fut.done():
+                continue
+            if exc is not None:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(result)
+
+    async def _rollback(self, conn: aiosqlite.Connection) -> None:
+        """Roll back a failed batch; if that fails too, drop the connection.
+
+        A connection whose transaction state is unknown is not reused: _run()
+        opens a new one before the next batch.
+        """
+        try:
+            if conn.in_transaction:
+                await conn.execute("ROLLBACK")
+            return
+        except Exception:
+            log.exception("SQLite ROLLBACK failed; reopening the writer connection")
+        self._conn = None
+        try:
+            await conn.close()
+        except Exception:
+            log.exception("Closing the failed writer connection failed")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": self.jobs,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "avg_commit_ms": round(1000 * self.commit_seconds / self.batches, 3) if self.batches else 0.0,
+        }
+
+
+# Private module-level handles; use get_pool() / connection() / write() elsewhere.
+_pool: ConnectionPool | None = None
+_writer: WriteQueue | None = None
+
+
+async def init_pool() -> None:
+    """Open the global read pool and start the writer (idempotent)."""
+    global _pool, _writer
+    if _pool is not None:
+        return
+    pool = ConnectionPool(_DB_PATH, settings.sqlite_pool_size)
+    await pool.open()
+    writer = WriteQueue(_DB_PATH, settings.sqlite_write_window_ms, settings.sqlite_write_max_batch)
+    await writer.open()
+    _pool, _writer = pool, writer
+    log.info("SQLite pool ready (%d connections + writer)", pool.size)
+
+
+async def close_pool() -> None:
+    """Drain the writer, then close and reset the global pool."""
+    global _pool, _writer
+    if _writer is not None:
+        await _writer.close()
+        _writer = None
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_pool() -> ConnectionPool:
+    """Return the live pool or raise if not initialized."""
+    if _pool is None:
+        raise RuntimeError("DB pool not initialized")
+    return _pool
+
+
+def get_writer() -> WriteQueue:
+    """Return the live writer or raise if not initialized."""
+    if _writer is None:
+        raise RuntimeError("DB writer not initialized")
+    return _writer
+
+
+def connection():
+    """Check out a pooled connection: `async with db.connection() as conn: ...`."""
+    return get_pool().connection()
+
+
+async def write(job: WriteJob[T]) -> T:
+    """Run `job(conn)` on the writer connection and await its committed result."""
+    return await get_writer().submit(job)
+
+
+async def run_exclusive(job: WriteJob[T]) -> T:
+    """Run `job(conn)` on the writer connection outside any transaction."""
+    return await get_writer().submit(job, exclusive=True)
+
+
+async def execute_write(sql: str, params: Any = ()) -> int:
+    """Single-statement write through the writer; returns the affected row count."""
+
+    async def _job(conn: aiosqlite.Connection) -> int:
+        cursor = await conn.execute(sql, params)
+        return cursor.rowcount
+
+    return await write(_job)
+
+
+async def execute_returning(sql: str, params: Any = ()) -> List[dict]:
+    """Single `... RETURNING` statement through the writer; returns the rows as dicts."""
+
+    async def _job(conn: aiosqlite.Connection) -> List[dict]:
+        cursor = await conn.execute(sql, params)
+        return [dict(row) for row in await cursor.fetchall()]
+
+    return await write(_job)
 
 
 def row_to_dict(row) -> dict | None:
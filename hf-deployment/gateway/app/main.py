@@ -1,16 +1,25 @@
 # gateway/app/main.py — HuggingFace Spaces version
 from __future__ import annotations
 
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .db import init_db
+from .db import init_db, init_pool, close_pool, get_pool, get_writer
+from .maintenance import maintenance_loop, maintenance_stats
+from .medical_tools import catalog, kb, monographs
+from .medical_tools.triage import get_engine
 from .telemetry.middleware import RequestIDMiddleware
 from .auth.routes import router as auth_router
 from .me.routes import router as me_router
 from .chat.routes import router as chat_router
+from .triage.routes import router as triage_router
+from .chat import llm
+from .chat import policy as chat_policy
+from .chat.cache import response_cache
+from .chat.singleflight import llm_flights
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -32,22 +41,54 @@ def create_app() -> FastAPI:
 
     app.add_middleware(RequestIDMiddleware)
 
+    background: list[asyncio.Task] = []
+
     @app.on_event("startup")
     async def _startup():
         await init_db()
+        await init_pool()
         log.info("SQLite database initialized")
+        await catalog.refresh_catalog()
+        await monographs.warm_cache(settings.drug_monograph_warm_count)
+        await asyncio.to_thread(kb.refresh_index)
+        background.append(asyncio.create_task(
+            catalog.refresh_loop(settings.drug_catalog_refresh_seconds)))
+        background.append(asyncio.create_task(
+            maintenance_loop(settings.sqlite_maintenance_interval_seconds)))
         log.info("Cookie settings: secure=%s, samesite=%s, name=%s",
                  settings.session_secure_cookies, settings.session_samesite,
                  settings.session_cookie_name)
         log.info("CORS origins: %s", settings.allowed_origins)
 
+    @app.on_event("shutdown")
+    async def _shutdown():
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        background.clear()
+        await close_pool()
+
     app.include_router(auth_router, prefix="/auth", tags=["auth"])
     app.include_router(me_router, prefix="/me", tags=["me"])
     app.include_router(chat_router, prefix="/chat", tags=["chat"])
+    app.include_router(triage_router, prefix="/triage", tags=["triage"])
 
     @app.get("/health", tags=["meta"])
     async def health():
-        return {"ok": True, "backend": "langgraph-huggingface", "version": "2.0.0"}
+        return {
+            "ok": True,
+            "backend": "langgraph-huggingface",
+            "version": "2.0.0",
+            "db_pool": get_pool().stats(),
+            "db_writer": get_writer().stats(),
+            "db_maintenance": maintenance_stats(),
+            "llm": llm.stats(),
+            "chat_cache": response_cache.stats(),
+            "chat_coalescing": llm_flights.stats(),
+            "chat_policy": chat_policy.stats(),
+            "triage_rules": get_engine().stats(),
+            "knowledge_base": kb.get_kb().stats(),
+        }
 
     return app
 
@@ -0,0 +1,149 @@
+# gateway/app/maintenance.py — periodic SQLite upkeep for the HF deployment
+#
+# Each pass runs on the writer connection between write batches:
+#   - wal_checkpoint(TRUNCATE) once the -wal file passes a size threshold
+#   - PRAGMA optimize (ANALYZE where the planner's statistics are stale)
+#   - incremental_vacuum in small steps while the freelist is non-empty
+#   - expired llm_response_cache rows are deleted through the writer queue
+#
+# The file sizes measured after each pass are kept with the counters, so
+# /health reports them without taking a pooled connection of its own.
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from . import db
+from .chat.cache import purge_expired
+from .config import settings
+
+log = logging.getLogger("gateway.maintenance")
+
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+_state: Dict[str, Any] = {
+    "passes": 0,
+    "checkpoints": 0,
+    "optimize_runs": 0,
+    "vacuumed_pages": 0,
+    "cache_rows_purged": 0,
+    "last_checkpoint": None,
+    "last_optimize_at": None,
+    "last_pass_at": None,
+    "sizes": None,  # database_sizes() after the last pass
+    "sizes_at": None,
+}
+
+
+async def _pragma(conn, sql: str):
+    cursor = await conn.execute(sql)
+    return await cursor.fetchall()
+
+
+async def _scalar(conn, sql: str) -> int:
+    rows = await _pragma(conn, sql)
+    return int(rows[0][0]) if rows else 0
+
+
+async def database_sizes() -> Dict[str, Any]:
+    """Main file, WAL and freelist sizes in bytes, plus the auto_vacuum mode."""
+    async with db.connection() as conn:
+        page_size = await _scalar(conn, "PRAGMA page_size")
+        page_count = await _scalar(conn, "PRAGMA page_count")
+        freelist = await _scalar(conn, "PRAGMA freelist_count")
+        auto_vacuum = await _scalar(conn, "PRAGMA auto_vacuum")
+    try:
+        wal_bytes = os.path.getsize(settings.database_path + "-wal")
+    except FileNotFoundError:
+        wal_bytes = 0
+    return {
+        "db_bytes": page_size * page_count,
+        "wal_bytes": wal_bytes,
+        "freelist_bytes": page_size * freelist,
+        "freelist_pages": freelist,
+        "auto_vacuum": _AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+    }
+
+
+async def _checkpoint(conn) -> Dict[str, int]:
+    busy, log_frames, checkpointed = (await _pragma(conn, "PRAGMA wal_checkpoint(TRUNCATE)"))[0]
+    return {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+
+
+async def _optimize(conn) -> None:
+    await conn.execute(f"PRAGMA analysis_limit = {settings.sqlite_analysis_limit}")
+    if not await _scalar(conn, "SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'"):
+        await conn.execute("ANALYZE")  # first run: no statistics at all yet
+    await conn.execute("PRAGMA optimize")
+
+
+async def _optimize_readers() -> None:
+    # optimize only considers tables a connection has queried, so let each
+    # pooled reader contribute; the idle queue is FIFO, so this visits them all.
+    pool = db.get_pool()
+    for _ in range(pool.size):
+        async with pool.connection() as conn:
+            await conn.execute("PRAGMA optimize")
+
+
+async def _vacuum_step(conn) -> int:
+    before = await _scalar(conn, "PRAGMA freelist_count")
+    if before:
+        # executescript steps the pragma to completion; execute() frees one page.
+        await conn.executescript(f"PRAGMA incremental_vacuum({settings.sqlite_vacuum_step_pages});")
+    return before - await _scalar(conn, "PRAGMA freelist_count")
+
+
+async def run_maintenance(force_optimize: bool = False) -> Dict[str, Any]:
+    """One maintenance pass; returns the sizes observed before it ran."""
+    sizes = await database_sizes()
+
+    if sizes["wal_bytes"] >= settings.sqlite_wal_checkpoint_bytes:
+        result = await db.run_exclusive(_checkpoint)
+        _state["checkpoints"] += 1
+        _state["last_checkpoint"] = result
+        if result["busy"]:
+            log.warning("WAL checkpoint blocked by readers (%d frames pending)", result["log_frames"])
+
+    last = _state["last_optimize_at"]
+    if force_optimize or last is None or time.time() - last >= settings.sqlite_optimize_interval_seconds:
+        await db.run_exclusive(_optimize)
+        await _optimize_readers()
+        _state["optimize_runs"] += 1
+        _state["last_optimize_at"] = time.time()
+
+    _state["cache_rows_purged"] += await purge_expired()
+
+    if sizes["auto_vacuum"] == "incremental" and sizes["freelist_pages"]:
+        _state["vacuumed_pages"] += await db.run_exclusive(_vacuum_step)
+
+    _state["passes"] += 1
+    _state["last_pass_at"] = time.time()
+    await _record_sizes()
+    return sizes
+
+
+async def _record_sizes() -> None:
+    _state["sizes"] = await database_sizes()
+    _state["sizes_at"] = time.time()
+
+
+def maintenance_stats() -> Dict[str, Any]:
+    """Counters and the sizes cached by the last pass; no database access."""
+    return dict(_state)
+
+
+async def maintenance_loop(interval_seconds: float) -> None:
+    try:
+        await _record_sizes()  # something to report before the first pass
+    except Exception:
+        log.exception("Reading SQLite file sizes failed")
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_maintenance()
+        except Exception:
+            log.exception("SQLite maintenance pass failed")
@@ -1,19 +1,21 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel, Field
 
 from ..deps import get_current_user
 from ..models.patient import PatientProfileOut, PatientUpdateIn
 from ..repos.patients import (
     get_patient_id_for_user,
-    fetch_profile_by_patient_id,
+    fetch_profile_json_by_patient_id,
     update_patient_by_id,
     create_patient_and_link,
 )
 from ..repos import encounters as enc_repo
+from ..repos.medications import fetch_regimen_for_patient
+from ..medical_tools.safety import evaluate_regimen
 
 router = APIRouter()
 
@@ -24,8 +26,11 @@ async def get_patient_profile(user=Depends(get_current_user)):
     pid = await get_patient_id_for_user(user_id)
     if not pid:
         return None
-    row = await fetch_profile_by_patient_id(pid)
-    return row
+    doc = await fetch_profile_json_by_patient_id(pid)
+    if doc is None:
+        return None
+    # Already shaped like PatientProfileOut by the query; skip re-serialization.
+    return Response(content=doc, media_type="application/json")
 
 
 @router.put("/patient")
@@ -100,3 +105,38 @@ async def save_intake(payload: IntakeSaveIn, user=Depends(get_current_user)):
     )
 
     return {"ok": True, "encounter_id": encounter_id, "note_id": note_id}
+
+
+class SafetyFindingOut(BaseModel):
+    kind: str
+    severity: str
+    drugs: List[str]
+    reason: Optional[str] = None
+    allergen: Optional[str] = None
+    condition: Optional[str] = None
+    mechanism: Optional[str] = None
+    clinical_effect: Optional[str] = None
+    management: Optional[str] = None
+
+
+class MedicationSafetyOut(BaseModel):
+    medications: List[str]
+    unrecognized: List[str]
+    severity: str
+    findings: List[SafetyFindingOut]
+    catalog_version: int
+
+
+@router.get("/medications/safety", response_model=MedicationSafetyOut | None)
+async def medication_safety(user=Depends(get_current_user)):
+    user_id = str(user["id"])
+    pid = await get_patient_id_for_user(user_id)
+    if not pid:
+        return None
+
+    regimen = await fetch_regimen_for_patient(pid)
+    return evaluate_regimen(
+        regimen["medications"],
+        allergies=regimen["allergies"],
+        conditions=regimen["conditions"],
+    )
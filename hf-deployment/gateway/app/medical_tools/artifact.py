@@ -0,0 +1,235 @@
+# gateway/app/medical_tools/artifact.py — compiled drug knowledge artifact (binary format)
+#
+# One file holds every catalog structure as flat native-endian arrays:
+#
+#   header   <4s I q I>   magic, format version, catalog version, section count
+#   sections <8s c 7x Q Q> name, array typecode, byte offset, item count
+#   payload  8-byte aligned arrays
+#
+# Loaders mmap the file read-only and wrap each section in a memoryview cast,
+# so every worker shares the same pages through the OS page cache. The same
+# container (with its own magic) also holds the knowledge-base index, kb.py.
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+MAGIC = b"MDKB"
+FORMAT_VERSION = 3  # 3: cross-reactivity keys of class terms no longer depend on drug names
+NONE = 0xFFFFFFFF  # string id sentinel for NULL
+
+_HEADER = struct.Struct("<4sIqI")
+_SECTION = struct.Struct("<8sc7xQQ")
+
+Sections = Dict[str, memoryview]
+
+
+class StringTableBuilder:
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self.offsets = array("I", [0])
+        self.blob = bytearray()
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self._ids)
+            self.blob += value.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return sid
+
+
+class StringTable(Sequence[str]):
+    """Read-only view of the first `count` entries of an artifact string table."""
+
+    __slots__ = ("_offsets", "_blob", "_count")
+
+    def __init__(self, offsets: memoryview, blob: memoryview, count: int) -> None:
+        self._offsets, self._blob, self._count = offsets, blob, count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, sid):  # type: ignore[override]
+        if isinstance(sid, slice):
+            return [self[i] for i in range(*sid.indices(self._count))]
+        if sid == NONE:
+            return None
+        if not 0 <= sid < self._count:
+            raise IndexError(sid)
+        return bytes(self._blob[self._offsets[sid]:self._offsets[sid + 1]]).decode("utf-8")
+
+
+def csr(rows: Iterable[Iterable[int]]) -> Tuple[array, array]:
+    offsets, values = array("I", [0]), array("I")
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def compile_catalog(
+    version: int,
+    drugs: Iterable[Mapping[str, Any]],
+    edges: Iterable[Tuple[str, str, int, Mapping[str, Any]]],
+    allergen_classes: Mapping[str, Tuple[str, ...]],
+    atc_levels: Tuple[int, ...],
+) -> bytes:
+    """Compile catalog source rows into the artifact byte layout."""
+    records = {d["drug_name"].lower().strip(): d for d in drugs}
+    names = sorted(records)
+    ids = {n: i for i, n in enumerate(names)}
+
+    strings = StringTableBuilder()
+    for name in names:  # drug ids == string ids 0..n-1, sorted for bisect lookups
+        strings.intern(name)
+
+    classes = [(records[n].get("drug_class") or "").lower().strip() for n in names]
+    drug_cls = array("I", (strings.intern(c) for c in classes))
+    ci_off, ci_str = csr(
+        [strings.intern(c.lower()) for c in records[n].get("contraindications") or ()] for n in names
+    )
+    brd_off, brd_str = csr(
+        [strings.intern(b.lower().strip()) for b in records[n].get("brand_names") or () if b.strip()]
+        for n in names
+    )
+
+    # Cross-reactivity keys: drug classes and ATC prefixes interned to dense ids.
+    keys: Dict[str, int] = {}
+
+    def key(label: str) -> int:
+        return keys.setdefault(label, len(keys))
+
+    drug_keys: List[set] = []
+    for name, cls in zip(names, classes):
+        row = {key("class:" + cls)} if cls else set()
+        for code in records[name].get("atc_codes") or ():
+            code = code.upper().strip()
+            row.update(key("atc:" + code[:n]) for n in atc_levels if len(code) >= n)
+        drug_keys.append(row)
+
+    # Class terms first, frozen: drug names below may coincide with them
+    # ("penicillin"), and must not change what a class covers.
+    class_terms: Dict[str, set] = {
+        term: {key("atc:" + p) for p in prefixes} for term, prefixes in allergen_classes.items()
+    }
+    for cls in set(classes) - {""}:
+        class_terms.setdefault(cls, set()).add(keys["class:" + cls])
+    frozen = {term: frozenset(ks) for term, ks in class_terms.items()}
+    by_drug: Dict[str, frozenset] = {}
+    for drug_id, name in enumerate(names):
+        # A drug allergen covers its own class plus any allergen class it belongs to.
+        own = {keys["class:" + classes[drug_id]]} if classes[drug_id] else set()
+        for term in allergen_classes:
+            if frozen[term] & drug_keys[drug_id]:
+                own |= frozen[term]
+        by_drug[name] = frozenset(own)
+    # Where a drug is named like a class, the curated class definition wins.
+    allergens: Dict[str, frozenset] = {**by_drug, **frozen}
+
+    key_off, key_ids = csr(sorted(row) for row in drug_keys)
+    key_lbl = array("I", (strings.intern(label.split(":", 1)[1])
+                          for label in sorted(keys, key=keys.__getitem__)))
+    terms = sorted(allergens)
+    alg_term = array("I", (strings.intern(t) for t in terms))
+    alg_off, alg_keys = csr(sorted(allergens[t]) for t in terms)
+
+    # Interactions: CSR adjacency with sorted neighbours and packed severity.
+    adjacency: List[List[Tuple[int, int, int]]] = [[] for _ in names]
+    det_str = array("I")
+    for a_name, b_name, severity, detail in edges:
+        a, b = ids.get(a_name.lower()), ids.get(b_name.lower())
+        if a is None or b is None or a == b:
+            continue
+        code = int(severity)
+        idx = len(det_str) // 3
+        det_str.extend(strings.intern(detail.get(f))
+                       for f in ("mechanism", "clinical_effect", "management"))
+        adjacency[a].append((b, code, idx))
+        adjacency[b].append((a, code, idx))
+    ix_off, ix_nbr = array("I", [0]), array("I")
+    ix_sev, ix_det = array("B"), array("I")
+    for row in adjacency:
+        for neighbor, code, idx in sorted(row):
+            ix_nbr.append(neighbor)
+            ix_sev.append(code)
+            ix_det.append(idx)
+        ix_off.append(len(ix_nbr))
+
+    sections = {
+        "names": array("I", [len(names)]),
+        "str_off": strings.offsets,
+        "str_blob": array("B", bytes(strings.blob)),
+        "drug_cls": drug_cls,
+        "ci_off": ci_off, "ci_str": ci_str,
+        "brd_off": brd_off, "brd_str": brd_str,
+        "key_off": key_off, "key_ids": key_ids, "key_lbl": key_lbl,
+        "alg_term": alg_term, "alg_off": alg_off, "alg_keys": alg_keys,
+        "ix_off": ix_off, "ix_nbr": ix_nbr, "ix_sev": ix_sev, "ix_det": ix_det,
+        "det_str": det_str,
+    }
+    return pack(version, sections)
+
+
+def pack(version: int, sections: Mapping[str, array], magic: bytes = MAGIC,
+         fmt: int = FORMAT_VERSION) -> bytes:
+    base = _HEADER.size + _SECTION.size * len(sections)
+    table, payload = bytearray(), bytearray()
+    for name, values in sections.items():
+        if len(name) > 8:
+            raise ValueError(f"section name {name!r} is longer than 8 bytes")
+        payload += b"\0" * (-(base + len(payload)) % 8)
+        table += _SECTION.pack(name.encode(), values.typecode.encode(), base + len(payload), len(values))
+        payload += values.tobytes()
+    return _HEADER.pack(magic, fmt, version, len(sections)) + bytes(table) + bytes(payload)
+
+
+def read_version(buf: Any, magic: bytes = MAGIC, fmt: int = FORMAT_VERSION) -> int:
+    found, found_fmt, version, _ = _HEADER.unpack_from(buf, 0)
+    if found != magic or found_fmt != fmt:
+        raise ValueError(f"Not a {magic.decode()} v{fmt} artifact")
+    return version
+
+
+def parse(buf: Any, magic: bytes = MAGIC, fmt: int = FORMAT_VERSION) -> Tuple[int, Sections]:
+    """Return (artifact version, section name -> typed memoryview) over `buf`."""
+    version = read_version(buf, magic, fmt)
+    _, _, _, count = _HEADER.unpack_from(buf, 0)
+    view = memoryview(buf)
+    sections: Sections = {}
+    for i in range(count):
+        name, typecode, offset, items = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+        code = typecode.decode()
+        size = array(code).itemsize * items
+        sections[name.rstrip(b"\0").decode()] = view[offset:offset + size].cast(code)
+    return version, sections
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write `data` next to `path` and rename over it, so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def open_mapped(path: str) -> Tuple[mmap.mmap, os.stat_result]:
+    """mmap `path` read-only; the returned stat identifies the file for reload checks."""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), st
@@ -0,0 +1,268 @@
+# gateway/app/medical_tools/catalog.py — drug catalog served from the compiled mmap artifact
+#
+# Drug names are interned to dense integer ids and the interaction pairs are
+# stored as a CSR adjacency (offsets + sorted neighbour ids) with severity packed
+# into a byte array, so an N-drug check is a pure in-memory pair scan. All of it
+# lives in one read-only mmap'd file (see artifact.py) shared by every worker.
+#
+# Build the artifact from the database: python -m app.medical_tools.catalog
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .. import db
+from ..config import settings
+from . import artifact
+
+log = logging.getLogger("gateway.catalog")
+
+SEVERITY_LEVELS = ("none", "minor", "moderate", "major", "contraindicated")
+_SEVERITY_CODE = {name: code for code, name in enumerate(SEVERITY_LEVELS)}
+
+# (drug_a_id, drug_b_id, severity_code, detail_index)
+Interaction = Tuple[int, int, int, int]
+
+# Allergen classes that cross-react, expressed as ATC prefixes. Drugs are keyed
+# by their ATC codes (levels 3-5) and drug_class, so an allergy matches any drug
+# sharing one of the allergen's keys.
+ALLERGEN_CLASSES: Dict[str, Tuple[str, ...]] = {
+    "penicillin": ("J01C",),
+    "penicillins": ("J01C",),
+    "beta-lactam": ("J01C", "J01D"),
+    "cephalosporin": ("J01DB", "J01DC", "J01DD", "J01DE"),
+    "sulfa": ("J01E",),
+    "sulfonamide": ("J01E",),
+    "nsaid": ("M01A", "N02BA"),
+    "nsaids": ("M01A", "N02BA"),
+    "salicylate": ("N02BA", "B01AC06"),
+    "ace inhibitor": ("C09A", "C09B"),
+    "macrolide": ("J01FA",),
+    "fluoroquinolone": ("J01MA",),
+    "tetracycline": ("J01AA",),
+    "opioid": ("N02A",),
+    "statin": ("C10AA",),
+}
+_ATC_LEVELS = (4, 5, 7)
+
+
+class DrugCatalog:
+    """Immutable snapshot of the drug catalog for one `kb_versions` version."""
+
+    __slots__ = ("version", "names", "identity", "_buf", "_s", "_strings")
+
+    def __init__(self, buf: Any, identity: Optional[Tuple[int, int, int]] = None) -> None:
+        self._buf = buf  # keeps the mmap alive as long as the snapshot is referenced
+        self.identity = identity
+        self.version, self._s = artifact.parse(buf)
+        offsets, blob = self._s["str_off"], self._s["str_blob"]
+        self._strings = artifact.StringTable(offsets, blob, len(offsets) - 1)
+        self.names = artifact.StringTable(offsets, blob, self._s["names"][0])
+
+    @classmethod
+    def empty(cls) -> "DrugCatalog":
+        return cls(compile_sources(-1, (), ()))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _find(self, ids: Sequence[int], value: str) -> Optional[int]:
+        """Binary search `ids` (string ids sorted by text) for `value`."""
+        strings = self._strings
+        lo, hi = 0, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if strings[ids[mid]] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(ids) and strings[ids[lo]] == value else None
+
+    def drug_id(self, name: str) -> Optional[int]:
+        key = name.lower().strip()
+        k = bisect_left(self.names, key)
+        return k if k < len(self.names) and self.names[k] == key else None
+
+    def drug_class(self, drug_id: int) -> str:
+        return self._strings[self._s["drug_cls"][drug_id]]
+
+    def brand_names(self, drug_id: int) -> Tuple[str, ...]:
+        off = self._s["brd_off"]
+        return tuple(self._strings[sid] for sid in self._s["brd_str"][off[drug_id]:off[drug_id + 1]])
+
+    def contraindications(self, drug_id: int) -> Tuple[str, ...]:
+        off = self._s["ci_off"]
+        return tuple(self._strings[sid] for sid in self._s["ci_str"][off[drug_id]:off[drug_id + 1]])
+
+    def is_allergen_term(self, term: str) -> bool:
+        """True for allergen class terms ("penicillin", "nsaid") and drug names."""
+        return self._find(self._s["alg_term"], term.lower().strip()) is not None
+
+    def cross_reactivity(self, drug_id: int, allergen: str) -> Tuple[str, ...]:
+        """Class / ATC keys shared by `drug_id` and `allergen` (empty if none)."""
+        term = self._find(self._s["alg_term"], allergen.lower().strip())
+        if term is None:
+            return ()
+        s = self._s
+        allergen_keys = set(s["alg_keys"][s["alg_off"][term]:s["alg_off"][term + 1]])
+        drug_keys = s["key_ids"][s["key_off"][drug_id]:s["key_off"][drug_id + 1]]
+        shared = allergen_keys.intersection(drug_keys)
+        return tuple(sorted(self._strings[s["key_lbl"][k]] for k in shared))
+
+    def detail(self, index: int) -> Dict[str, Any]:
+        mechanism, effect, management = self._s["det_str"][index * 3:index * 3 + 3]
+        return {
+            "mechanism": self._strings[mechanism],
+            "clinical_effect": self._strings[effect],
+            "management": self._strings[management],
+        }
+
+    def interactions(self, drug_ids: Iterable[int]) -> List[Interaction]:
+        """Return every interacting pair among `drug_ids`, most severe first."""
+        ids = sorted(set(drug_ids))
+        offsets, neighbors = self._s["ix_off"], self._s["ix_nbr"]
+        severity, detail = self._s["ix_sev"], self._s["ix_det"]
+        found: List[Interaction] = []
+        for i, a in enumerate(ids):
+            lo, hi = offsets[a], offsets[a + 1]
+            if lo == hi:
+                continue
+            for b in ids[i + 1:]:
+                k = bisect_left(neighbors, b, lo, hi)
+                if k < hi and neighbors[k] == b:
+                    found.append((a, b, severity[k], detail[k]))
+        found.sort(key=lambda f: -f[2])
+        return found
+
+
+def compile_sources(version: int, drugs: Iterable[Dict[str, Any]], edges: Iterable[Tuple]) -> bytes:
+    return artifact.compile_catalog(
+        version,
+        drugs,
+        ((a, b, _SEVERITY_CODE.get((sev or "").lower(), 0), detail) for a, b, sev, detail in edges),
+        ALLERGEN_CLASSES,
+        _ATC_LEVELS,
+    )
+
+
+_catalog: DrugCatalog = DrugCatalog.empty()
+
+
+def get_catalog() -> DrugCatalog:
+    """Return the current snapshot (swapped atomically on refresh)."""
+    return _catalog
+
+
+async def _fetch_version(conn) -> int:
+    cursor = await conn.execute("SELECT version FROM kb_versions WHERE name = 'drugs'")
+    row = await cursor.fetchone()
+    return int(row["version"]) if row else 0
+
+
+async def build_artifact(path: Optional[str] = None) -> int:
+    """Compile drugs/drug_interactions into the artifact file; returns its version."""
+    path = path or settings.drug_artifact_path
+    async with db.connection() as conn:
+        version = await _fetch_version(conn)
+        cursor = await conn.execute(
+            "SELECT drug_name, drug_class, atc_codes, contraindications, brand_names FROM drugs"
+        )
+        drugs = [
+            {
+                "drug_name": r["drug_name"],
+                "drug_class": r["drug_class"],
+                "atc_codes": json.loads(r["atc_codes"] or "[]"),
+                "contraindications": json.loads(r["contraindications"] or "[]"),
+                "brand_names": json.loads(r["brand_names"] or "[]"),
+            }
+            for r in await cursor.fetchall()
+        ]
+        cursor = await conn.execute(
+            """
+            SELECT a.drug_name AS a_name, b.drug_name AS b_name, i.severity,
+                   i.mechanism, i.clinical_effect, i.management
+            FROM drug_interactions i
+            JOIN drugs a ON a.id = i.primary_drug_id
+            JOIN drugs b ON b.id = i.interacting_drug_id
+            """
+        )
+        edges = [
+            (r["a_name"], r["b_name"], r["severity"], {
+                "mechanism": r["mechanism"],
+                "clinical_effect": r["clinical_effect"],
+                "management": r["management"],
+            })
+            for r in await cursor.fetchall()
+        ]
+
+    data = compile_sources(version, drugs, edges)
+    await asyncio.to_thread(artifact.write_atomic, path, data)
+    log.info("Drug artifact v%d written to %s: %d drugs, %d interactions, %d bytes",
+             version, path, len(drugs), len(edges), len(data))
+    return version
+
+
+def _artifact_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _artifact_version(path: str) -> Optional[int]:
+    try:
+        with open(path, "rb") as f:
+            return artifact.read_version(f.read(64))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_catalog(path: Optional[str] = None) -> DrugCatalog:
+    """mmap the artifact read-only and install it as the current snapshot."""
+    global _catalog
+    path = path or settings.drug_artifact_path
+    mapped, st = artifact.open_mapped(path)
+    _catalog = DrugCatalog(mapped, identity=(st.st_ino, st.st_size, st.st_mtime_ns))
+    log.info("Drug catalog v%d mapped from %s (%d drugs)", _catalog.version, path, len(_catalog))
+    return _catalog
+
+
+async def refresh_catalog() -> bool:
+    """Rebuild the artifact if the tables changed and remap it if the file changed."""
+    path = settings.drug_artifact_path
+    async with db.connection() as conn:
+        version = await _fetch_version(conn)
+    if _artifact_version(path) != version:
+        await build_artifact(path)
+    if _artifact_identity(path) == _catalog.identity:
+        return False
+    load_catalog(path)
+    return True
+
+
+async def refresh_loop(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await refresh_catalog()
+        except Exception:
+            log.exception("Drug catalog refresh failed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def _main(path: Optional[str]) -> None:
+        await db.init_pool()
+        try:
+            await build_artifact(path)
+        finally:
+            await db.close_pool()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,172 @@
+# gateway/app/medical_tools/cohort.py — clinical scores for whole cohorts at once
+#
+# calc_clinical_scores (tools.py) handles one patient from scalar arguments.
+# For population-level reviews (renal dosing, obesity registers) this module
+# reads every patient's latest weight, height and serum creatinine plus age and
+# sex in one query, computes the scores as NumPy column operations and can
+# write BMI and eGFR back to each patient's latest vitals row in one
+# transaction.
+#
+# Missing or implausible inputs are masked per score: a patient with no height
+# still gets creatinine clearance, and a score that cannot be computed is None
+# (and leaves the stored value untouched on write-back).
+#
+#   python -m app.medical_tools.cohort            # print a summary
+#   python -m app.medical_tools.cohort --write    # also update vitals.bmi / egfr
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..repos import vitals as vitals_repo
+
+log = logging.getLogger("gateway.cohort")
+
+SCORES = ("bmi", "bsa_m2", "creatinine_clearance_ml_min", "egfr_ml_min_1_73m2")
+_DECIMALS = {"bmi": 2, "bsa_m2": 2, "creatinine_clearance_ml_min": 1, "egfr_ml_min_1_73m2": 1}
+
+
+def _parse_dates(values: Sequence[Optional[str]]) -> np.ndarray:
+    cleaned = [(v or "")[:10] or "NaT" for v in values]
+    try:
+        return np.array(cleaned, dtype="datetime64[D]")
+    except ValueError:  # at least one malformed date: parse one by one
+        out = np.empty(len(cleaned), dtype="datetime64[D]")
+        for i, value in enumerate(cleaned):
+            try:
+                out[i] = np.datetime64(value, "D")
+            except ValueError:
+                out[i] = np.datetime64("NaT")
+        return out
+
+
+def ages(dates_of_birth: Sequence[Optional[str]], as_of: Optional[date] = None) -> np.ndarray:
+    """Whole years at `as_of` (default today) per ISO date of birth; NaN when unknown."""
+    as_of = as_of or date.today()
+    dob = _parse_dates(dates_of_birth)
+    valid = ~np.isnat(dob) & (dob <= np.datetime64(as_of, "D"))
+    dob = np.where(valid, dob, np.datetime64(as_of, "D"))
+    months = dob.astype("datetime64[M]").astype(np.int64)
+    year, month = months // 12 + 1970, months % 12 + 1
+    day = (dob - dob.astype("datetime64[M]")).astype(np.int64) + 1
+    before_birthday = (month * 100 + day) > (as_of.month * 100 + as_of.day)
+    age = (as_of.year - year - before_birthday).astype(np.float64)
+    age[~valid] = np.nan
+    return age
+
+
+def compute_scores(
+    age: np.ndarray,
+    female: np.ndarray,
+    weight_kg: np.ndarray,
+    height_cm: np.ndarray,
+    creatinine_mg_dl: np.ndarray,
+    sex_known: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """BMI, BSA (Mosteller), creatinine clearance (Cockcroft-Gault) and eGFR
+    (CKD-EPI 2021) per row; NaN where an input the score needs is missing.
+
+    All inputs are equal-length arrays; missing numeric values are NaN.
+    """
+    female = np.asarray(female, dtype=bool)
+    sex_known = np.ones_like(female) if sex_known is None else np.asarray(sex_known, dtype=bool)
+    weight = np.where(weight_kg > 0, weight_kg, np.nan)
+    height = np.where(height_cm > 0, height_cm, np.nan)
+    scr = np.where(creatinine_mg_dl > 0, creatinine_mg_dl, np.nan)
+    age = np.where((age >= 18) & (age < 130), age, np.nan)  # both renal equations are for adults
+    renal_ok = sex_known & ~np.isnan(age) & ~np.isnan(scr)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bmi = weight / (height / 100.0) ** 2
+        bsa = np.sqrt(height * weight / 3600.0)
+        crcl = (140 - age) * weight / (72.0 * scr) * np.where(female, 0.85, 1.0)
+        kappa = np.where(female, 0.7, 0.9)
+        alpha = np.where(female, -0.241, -0.302)
+        ratio = scr / kappa
+        egfr = (142 * np.minimum(ratio, 1) ** alpha * np.maximum(ratio, 1) ** -1.200
+                * 0.9938 ** age * np.where(female, 1.012, 1.0))
+    crcl[~renal_ok] = np.nan
+    egfr[~renal_ok] = np.nan
+    return {"bmi": bmi, "bsa_m2": bsa, "creatinine_clearance_ml_min": crcl, "egfr_ml_min_1_73m2": egfr}
+
+
+def scores_for_rows(rows: Sequence[Dict[str, Any]], as_of: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """compute_scores over rows shaped like vitals_repo.fetch_cohort_measurements()."""
+    sex = [(r.get("sex") or "").lower() for r in rows]
+
+    def column(name: str) -> np.ndarray:
+        return np.array([r.get(name) for r in rows], dtype=np.float64)  # None -> NaN
+
+    return compute_scores(
+        age=ages([r.get("date_of_birth") for r in rows], as_of),
+        female=np.array([s.startswith("f") for s in sex], dtype=bool),
+        sex_known=np.array([s.startswith(("f", "m")) for s in sex], dtype=bool),
+        weight_kg=column("weight_kg"),
+        height_cm=column("height_cm"),
+        creatinine_mg_dl=column("serum_creatinine"),
+    )
+
+
+def _rounded(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    return [None if np.isnan(v) else v for v in np.round(values, decimals).tolist()]
+
+
+async def cohort_scores(
+    patient_ids: Optional[Sequence[str]] = None,
+    write_back: bool = False,
+) -> Dict[str, Any]:
+    """Scores for every patient (or `patient_ids`) with vitals on file.
+
+    With write_back=True, BMI and eGFR are stored on each patient's latest
+    vitals row in one transaction.
+    """
+    rows = await vitals_repo.fetch_cohort_measurements(patient_ids)
+    scores = await asyncio.to_thread(scores_for_rows, rows)
+    columns = {name: _rounded(scores[name], _DECIMALS[name]) for name in SCORES}
+
+    written = 0
+    if write_back:
+        written = await vitals_repo.update_vitals_scores([
+            (row["vitals_id"], bmi, egfr)
+            for row, bmi, egfr in zip(rows, columns["bmi"], columns["egfr_ml_min_1_73m2"])
+            if bmi is not None or egfr is not None
+        ])
+        log.info("Cohort scores written to %d vitals rows", written)
+
+    results = [
+        {"patient_id": row["patient_id"], "vitals_id": row["vitals_id"],
+         **{name: columns[name][i] for name in SCORES}}
+        for i, row in enumerate(rows)
+    ]
+    computed = {name: int(np.count_nonzero(~np.isnan(scores[name]))) for name in SCORES}
+    return {"patients": len(rows), "computed": computed, "written": written, "results": results}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from .. import db
+
+    parser = argparse.ArgumentParser(description="Cohort BMI / BSA / CrCl / eGFR.")
+    parser.add_argument("patient_ids", nargs="*", help="limit to these patients (default: all)")
+    parser.add_argument("--write", action="store_true", help="write BMI and eGFR back to the latest vitals rows")
+    parser.add_argument("--rows", action="store_true", help="print per-patient results")
+    args = parser.parse_args()
+
+    async def _main() -> Dict[str, Any]:
+        await db.init_pool()
+        try:
+            return await cohort_scores(args.patient_ids or None, write_back=args.write)
+        finally:
+            await db.close_pool()
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(_main())
+    if not args.rows:
+        report.pop("results")
+    print(json.dumps(report, indent=2))
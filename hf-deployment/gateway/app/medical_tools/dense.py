@@ -0,0 +1,148 @@
+# gateway/app/medical_tools/dense.py — dense-vector tier of the knowledge-base search
+#
+# Chunk embeddings are computed once, when the index is built, and stored in
+# the knowledge-base artifact (kb.py) as a row-major float16 or int8 matrix
+# (int8 rows carry a float32 scale). At query time the matrix is a zero-copy
+# NumPy view over the mmap; scores are batched matrix-vector products over
+# blocks of rows (widened to float32 one block at a time) and the top k come
+# from argpartition.
+#
+# Large corpora get an IVF layer: rows are clustered with spherical k-means
+# and stored grouped by cluster, so a query scores the centroids first and
+# then scans only the `nprobe` closest clusters, each a contiguous row range.
+#
+# Embeddings come from the local hashing vectorizer also used by the response
+# cache (chat/semantic.py): no model download and no network at query time.
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+from ..chat.semantic import HashingVectorizer
+
+DTYPES = ("float16", "int8")
+_BLOCK = 1024  # rows widened to float32 per matrix-vector product (stays in cache)
+_KMEANS_SAMPLE = 50000
+_KMEANS_ITERATIONS = 8
+
+
+def embed(texts: Iterable[str], dim: int) -> np.ndarray:
+    """(n, dim) float32 unit vectors for already-normalised `texts`."""
+    vectorizer = HashingVectorizer(dim)
+    rows = [vectorizer.transform(t) for t in texts]
+    return np.vstack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), 16 * _BLOCK):
+        labels[start:start + 16 * _BLOCK] = (x[start:start + 16 * _BLOCK] @ centroids.T).argmax(axis=1)
+    return labels
+
+
+def kmeans(x: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit rows) for the unit rows of `x`."""
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), min(len(x), _KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # An empty cluster keeps its previous centroid.
+        centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1, norms))
+    return centroids.astype(np.float32)
+
+
+def auto_nlist(rows: int, min_rows: int) -> int:
+    """IVF cluster count: none below `min_rows`, about sqrt(rows) otherwise."""
+    return int(np.sqrt(rows)) if rows >= min_rows else 0
+
+
+def compile_sections(vectors: np.ndarray, dtype: str = "float16", nlist: int = 0) -> Dict[str, array]:
+    """Artifact sections for `vectors` (one unit row per chunk id)."""
+    if dtype not in DTYPES:
+        raise ValueError(f"dense dtype must be one of {DTYPES}, got {dtype!r}")
+    n, dim = vectors.shape
+    if nlist > 1 and n >= nlist:
+        centroids = kmeans(vectors, nlist)
+        labels = _assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(nlist + 1))
+    else:
+        centroids = np.zeros((0, dim), dtype=np.float32)
+        order = np.arange(n)
+        offsets = np.array([0, n])
+    rows = vectors[order]
+    if dtype == "int8":
+        scale = np.abs(rows).max(axis=1) / 127 if n else np.zeros(0)
+        scale[scale == 0] = 1.0
+        stored = np.round(rows / scale[:, None]).astype(np.int8)
+        emb, scl = array("b", stored.tobytes()), array("f", scale.astype(np.float32).tobytes())
+    else:
+        emb, scl = array("H", rows.astype(np.float16).tobytes()), array("f")
+    return {
+        "dns_prm": array("I", [dim, DTYPES.index(dtype), len(centroids)]),
+        "dns_emb": emb,
+        "dns_scl": scl,
+        "dns_ids": array("I", order.astype(np.uint32).tobytes()),
+        "ivf_cen": array("f", centroids.tobytes()),
+        "ivf_off": array("I", np.asarray(offsets, dtype=np.uint32).tobytes()),
+    }
+
+
+class DenseIndex:
+    """Read-only view over the dense sections of a mapped knowledge-base artifact."""
+
+    def __init__(self, sections: Dict[str, memoryview]) -> None:
+        self.dim, dtype_code, self.nlist = sections["dns_prm"]
+        self.dtype = DTYPES[dtype_code]
+        raw = np.frombuffer(sections["dns_emb"], dtype=np.float16 if self.dtype == "float16" else np.int8)
+        self._emb = raw.reshape(-1, self.dim)
+        self._scale = np.frombuffer(sections["dns_scl"], dtype=np.float32)
+        self._ids = np.frombuffer(sections["dns_ids"], dtype=np.uint32)
+        self._centroids = np.frombuffer(sections["ivf_cen"], dtype=np.float32).reshape(-1, self.dim)
+        self._offsets = np.frombuffer(sections["ivf_off"], dtype=np.uint32)
+        self.vectorizer = HashingVectorizer(self.dim)
+
+    def __len__(self) -> int:
+        return len(self._emb)
+
+    def _score_rows(self, lo: int, hi: int, q: np.ndarray) -> np.ndarray:
+        out = np.empty(hi - lo, dtype=np.float32)
+        buf = np.empty((min(_BLOCK, hi - lo), self.dim), dtype=np.float32)
+        for start in range(lo, hi, _BLOCK):
+            end = min(start + _BLOCK, hi)
+            block = buf[:end - start]
+            np.copyto(block, self._emb[start:end])
+            np.dot(block, q, out=out[start - lo:end - lo])
+        if self.dtype == "int8":
+            out *= self._scale[lo:hi]
+        return out
+
+    def search_vector(self, q: np.ndarray, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """(chunk ids, cosine scores) of the `k` nearest rows, best first."""
+        if self.nlist:
+            probes = min(nprobe, self.nlist)
+            nearest = np.argpartition(-(self._centroids @ q), probes - 1)[:probes]
+            ranges = [(int(self._offsets[c]), int(self._offsets[c + 1])) for c in nearest]
+        else:
+            ranges = [(0, len(self._emb))]
+        rows = np.concatenate([np.arange(lo, hi) for lo, hi in ranges])
+        scores = np.concatenate([self._score_rows(lo, hi, q) for lo, hi in ranges])
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return self._ids[rows[best]].astype(np.int64), scores[best]
+
+    def search(self, text: str, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        return self.search_vector(self.vectorizer.transform(text), k, nprobe)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": len(self), "dim": self.dim, "dtype": self.dtype, "ivf_lists": self.nlist}
@@ -0,0 +1,428 @@
+# gateway/app/medical_tools/kb.py — local medical knowledge base with BM25 search
+#
+# Ingestion streams guideline documents (Markdown / text files, or JSON lines
+# with title, text and source) one at a time, splits them into overlapping
+# word windows along paragraph boundaries and builds an inverted index:
+#
+#   terms     sorted vocabulary (term id == string id, so lookups bisect)
+#   pst_*     CSR postings: per term, the chunk ids containing it and the
+#             term's BM25 contribution to each (idf * saturated tf, with the
+#             length normalisation already applied), as float32
+#   chk_*     per chunk: text and owning document
+#   doc_*     per document: title and source
+#
+# The index is written in the artifact container (see artifact.py) and mapped
+# read-only, so every worker shares the pages. Because the BM25 weights are
+# precomputed, a query is one vectorised scatter-add per query term into a
+# score array over all chunks, followed by a partial sort for the top k.
+#
+# The same file carries a dense-vector tier (dense.py): one embedding per
+# chunk, searched by cosine similarity. search(mode="hybrid") fuses the BM25
+# and dense rankings with reciprocal rank fusion, so exact clinical terms and
+# near-miss spellings or word forms ("hypertensive", "anticoagulant") both
+# contribute. A chunk found only by the dense tier needs a cosine of at least
+# kb_hybrid_dense_only_min_score to be fused in.
+#
+# The index is rebuilt at startup when the source documents or the build
+# settings changed (both are hashed into the index version).
+#
+# Build the index by hand: python -m app.medical_tools.kb [source_dir] [index_path]
+# Benchmark: python benchmarks/kb_search.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+from . import artifact, dense
+
+log = logging.getLogger("gateway.kb")
+
+MAGIC = b"MDIX"
+FORMAT_VERSION = 2
+SEARCH_MODES = ("bm25", "dense", "hybrid")
+DEFAULT_SOURCE_DIR = os.path.join(os.path.dirname(__file__), "kb_docs")
+SOURCE_EXTENSIONS = (".md", ".txt", ".jsonl")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be been but by can do does for from had has have how i if in into is it its "
+    "may me my no not of on or our should so such than that the their them then there these they "
+    "this to was we were what when where which while who will with would you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+@dataclass(frozen=True, slots=True)
+class Document:
+    title: str
+    source: str
+    text: str
+
+
+def _read_text_file(path: str) -> Document:
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    title = os.path.splitext(os.path.basename(path))[0].replace("_", " ").title()
+    source = "Local knowledge base"
+    body: List[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("# ") and not body:
+            title = stripped[2:].strip()
+        elif stripped.lower().startswith("source:") and not body:
+            source = stripped.split(":", 1)[1].strip()
+        elif stripped or body:
+            body.append(line)
+    return Document(title, source, "\n".join(body))
+
+
+def iter_documents(source_dir: str) -> Iterator[Document]:
+    """Documents under `source_dir`, one file (or JSON line) at a time, in path order."""
+    for path in _source_files(source_dir):
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        yield Document(rec.get("title") or "", rec.get("source") or "", rec.get("text") or "")
+        else:
+            yield _read_text_file(path)
+
+
+def _source_files(source_dir: str) -> List[str]:
+    found = []
+    for dirpath, _, filenames in os.walk(source_dir):
+        found.extend(os.path.join(dirpath, n) for n in filenames if n.endswith(SOURCE_EXTENSIONS))
+    return sorted(found)
+
+
+def source_version(source_dir: str, build_params: str = "") -> int:
+    """Fingerprint of the source files (names, sizes, mtimes) and build settings, used as the index version."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(build_params.encode())
+    for path in _source_files(source_dir):
+        st = os.stat(path)
+        digest.update(f"{os.path.relpath(path, source_dir)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return int.from_bytes(digest.digest(), "little", signed=True)
+
+
+def chunk_text(text: str, max_words: int, overlap: int) -> Iterator[str]:
+    """Word windows of at most `max_words`, closed at paragraph ends when possible.
+
+    A paragraph longer than the window is split with `overlap` words repeated
+    at the start of the next piece so a sentence cut at the edge still matches.
+    """
+    pending: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if pending and len(pending) + len(words) > max_words:
+            yield " ".join(pending)
+            pending = []
+        pending.extend(words)
+        while len(pending) > max_words:
+            yield " ".join(pending[:max_words])
+            pending = pending[max_words - overlap:]
+    if pending:
+        yield " ".join(pending)
+
+
+def compile_index(
+    version: int,
+    documents: Iterable[Document],
+    max_words: int = 120,
+    overlap: int = 20,
+    k1: float = 1.2,
+    b: float = 0.75,
+    dense_dim: int = 0,
+    dense_dtype: str = "float16",
+    dense_ivf_min_chunks: int = 0,
+) -> bytes:
+    """Chunk and index `documents` into the index byte layout.
+
+    dense_dim=0 leaves out the dense tier. With at least dense_ivf_min_chunks
+    chunks (and the setting non-zero) the dense rows are clustered for IVF search.
+    """
+    chk_doc = array("I")
+    chunk_lengths: List[int] = []
+    texts: List[str] = []
+    normalized: List[str] = []
+    postings: Dict[str, Tuple[array, array]] = {}  # term -> (chunk ids, term frequencies)
+
+    titles: List[str] = []
+    sources: List[str] = []
+    for doc_id, doc in enumerate(documents):
+        titles.append(doc.title)
+        sources.append(doc.source)
+        for text in chunk_text(doc.text, max_words, overlap):
+            chunk_id = len(texts)
+            texts.append(text)
+            chk_doc.append(doc_id)
+            # Titles are indexed with every chunk of their document.
+            tokens = tokenize(doc.title + "\n" + text)
+            chunk_lengths.append(len(tokens))
+            if dense_dim:
+                normalized.append(" ".join(tokens))
+            counts: Dict[str, int] = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, tf in counts.items():
+                entry = postings.get(t)
+                if entry is None:
+                    entry = postings[t] = (array("I"), array("I"))
+                entry[0].append(chunk_id)
+                entry[1].append(tf)
+
+    strings = artifact.StringTableBuilder()
+    terms = sorted(postings)
+    for term in terms:  # term ids == string ids 0..n-1, sorted for bisect lookups
+        strings.intern(term)
+    chk_txt = array("I", (strings.intern(t) for t in texts))
+    doc_title = array("I", (strings.intern(t) for t in titles))
+    doc_src = array("I", (strings.intern(s) for s in sources))
+
+    n_chunks = len(texts)
+    lengths = np.array(chunk_lengths, dtype=np.float64)
+    avgdl = float(lengths.mean()) if n_chunks else 0.0
+    norm = k1 * (1 - b + b * lengths / avgdl) if n_chunks else lengths
+    pst_off, pst_doc, pst_w = array("I", [0]), array("I"), array("f")
+    for term in terms:
+        ids, tfs = postings[term]
+        df = len(ids)
+        idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+        freq = np.frombuffer(tfs.tobytes(), dtype=np.uint32).astype(np.float64)
+        weights = idf * freq * (k1 + 1) / (freq + norm[np.frombuffer(ids.tobytes(), dtype=np.uint32)])
+        pst_doc.extend(ids)
+        pst_w.frombytes(weights.astype(np.float32).tobytes())
+        pst_off.append(len(pst_doc))
+
+    sections = {
+        "terms": array("I", [len(terms)]),
+        "str_off": strings.offsets,
+        "str_blob": array("B", bytes(strings.blob)),
+        "pst_off": pst_off, "pst_doc": pst_doc, "pst_w": pst_w,
+        "chk_txt": chk_txt, "chk_doc": chk_doc,
+        "doc_ttl": doc_title, "doc_src": doc_src,
+        "params": array("d", [k1, b, avgdl]),
+    }
+    if dense_dim:
+        nlist = dense.auto_nlist(n_chunks, dense_ivf_min_chunks) if dense_ivf_min_chunks else 0
+        sections.update(dense.compile_sections(dense.embed(normalized, dense_dim), dense_dtype, nlist))
+    return artifact.pack(version, sections, magic=MAGIC, fmt=FORMAT_VERSION)
+
+
+class KnowledgeBase:
+    """Immutable, mmap-backed BM25 (and optional dense) index over the knowledge-base chunks."""
+
+    def __init__(self, buf: Any, identity: Optional[Tuple[int, int, int]] = None, source: str = "") -> None:
+        self._buf = buf  # keeps the mmap alive as long as the index is referenced
+        self.identity = identity
+        self.source = source
+        self.version, self._s = artifact.parse(buf, magic=MAGIC, fmt=FORMAT_VERSION)
+        offsets, blob = self._s["str_off"], self._s["str_blob"]
+        self._strings = artifact.StringTable(offsets, blob, len(offsets) - 1)
+        self.terms = artifact.StringTable(offsets, blob, self._s["terms"][0])
+        self._off = self._s["pst_off"]
+        # Zero-copy views over the mapped postings.
+        self._doc = np.frombuffer(self._s["pst_doc"], dtype=np.uint32)
+        self._w = np.frombuffer(self._s["pst_w"], dtype=np.float32)
+        self.chunks = len(self._s["chk_doc"])
+        self.dense = dense.DenseIndex(self._s) if "dns_prm" in self._s and self.chunks else None
+
+    @classmethod
+    def empty(cls) -> "KnowledgeBase":
+        return cls(compile_index(0, ()))
+
+    def __len__(self) -> int:
+        return self.chunks
+
+    def term_id(self, term: str) -> Optional[int]:
+        k = bisect_left(self.terms, term)
+        return k if k < len(self.terms) and self.terms[k] == term else None
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for `query` (zero where no term matches)."""
+        scores = np.zeros(self.chunks, dtype=np.float32)
+        for term in dict.fromkeys(tokenize(query)):
+            tid = self.term_id(term)
+            if tid is not None:
+                lo, hi = self._off[tid], self._off[tid + 1]
+                # A term lists each chunk once, so plain fancy-index += is exact.
+                scores[self._doc[lo:hi]] += self._w[lo:hi]
+        return scores
+
+    def dense_scores(self, query: str, k: int) -> Dict[int, float]:
+        """Chunk id -> cosine similarity for the `k` nearest chunks above kb_dense_min_score."""
+        if self.dense is None:
+            return {}
+        ids, sims = self.dense.search(" ".join(tokenize(query)), k, settings.kb_dense_nprobe)
+        floor = settings.kb_dense_min_score
+        return {int(i): float(s) for i, s in zip(ids, sims) if s >= floor}
+
+    def search(self, query: str, limit: int = 3, mode: str = "bm25") -> List[Dict[str, Any]]:
+        """Top `limit` chunks, best first, by BM25, dense similarity or both fused."""
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"search mode must be one of {SEARCH_MODES}, got {mode!r}")
+        if limit <= 0 or not self.chunks:
+            return []
+        if self.dense is None:
+            mode = "bm25"
+        if mode == "dense":
+            return [self.hit(i, s, dense=s) for i, s in self.dense_scores(query, limit).items()]
+        scores = self.scores(query)
+        if mode == "bm25":
+            return [self.hit(int(i), float(scores[i]), bm25=float(scores[i])) for i in top_k(scores, limit)]
+
+        # Weighted reciprocal rank fusion over a deeper candidate list from each tier.
+        depth = max(limit * 4, 20)
+        lexical = {int(i): float(scores[i]) for i in top_k(scores, depth)}
+        # A chunk with no query term in it must earn its place on similarity
+        # alone; near the dense floor that is noise ("capital of france").
+        only = settings.kb_hybrid_dense_only_min_score
+        semantic = {i: s for i, s in self.dense_scores(query, depth).items() if i in lexical or s >= only}
+        k = settings.kb_fusion_rrf_k
+        fused: Dict[int, float] = {}
+        for ranking, weight in ((lexical, 1.0), (semantic, settings.kb_fusion_dense_weight)):
+            for rank, chunk_id in enumerate(ranking):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + weight / (k + rank + 1)
+        best = sorted(fused, key=lambda c: (-fused[c], c))[:limit]
+        return [self.hit(c, fused[c], bm25=lexical.get(c), dense=semantic.get(c)) for c in best]
+
+    def hit(self, chunk_id: int, score: float, bm25: Optional[float] = None,
+            dense: Optional[float] = None) -> Dict[str, Any]:
+        s = self._s
+        doc_id = s["chk_doc"][chunk_id]
+        return {
+            "title": self._strings[s["doc_ttl"][doc_id]],
+            "snippet": snippet(self._strings[s["chk_txt"][chunk_id]]),
+            "score": round(score, 4),
+            "bm25": None if bm25 is None else round(bm25, 4),
+            "dense": None if dense is None else round(dense, 4),
+            "source": self._strings[s["doc_src"][doc_id]],
+            "chunk_id": chunk_id,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        k1, b, avgdl = self._s["params"]
+        return {
+            "source": self.source,
+            "version": self.version,
+            "documents": len(self._s["doc_ttl"]),
+            "chunks": self.chunks,
+            "terms": len(self.terms),
+            "postings": len(self._doc),
+            "avg_chunk_terms": round(avgdl, 1),
+            "dense": self.dense.stats() if self.dense is not None else None,
+        }
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest positive scores, best first (ties by index)."""
+    matched = np.count_nonzero(scores > 0)
+    k = min(k, matched)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        # O(n) selection; only the k winners get sorted.
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def snippet(text: str, max_chars: int = 280) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+_kb: KnowledgeBase = KnowledgeBase.empty()
+
+
+def get_kb() -> KnowledgeBase:
+    """Return the current index snapshot (swapped atomically on refresh)."""
+    return _kb
+
+
+def _source_dir() -> str:
+    return settings.kb_source_dir or DEFAULT_SOURCE_DIR
+
+
+def _build_params() -> Dict[str, Any]:
+    return {
+        "max_words": settings.kb_chunk_words,
+        "overlap": settings.kb_chunk_overlap_words,
+        "k1": settings.kb_bm25_k1,
+        "b": settings.kb_bm25_b,
+        "dense_dim": settings.kb_dense_dim,
+        "dense_dtype": settings.kb_dense_dtype,
+        "dense_ivf_min_chunks": settings.kb_dense_ivf_min_chunks,
+    }
+
+
+def _version(source_dir: str) -> int:
+    return source_version(source_dir, json.dumps(_build_params(), sort_keys=True))
+
+
+def build_index(source_dir: Optional[str] = None, path: Optional[str] = None) -> int:
+    """Ingest `source_dir` into the index file at `path`; returns the index version."""
+    source_dir = source_dir or _source_dir()
+    path = path or settings.kb_index_path
+    version = _version(source_dir)
+    data = compile_index(version, iter_documents(source_dir), **_build_params())
+    artifact.write_atomic(path, data)
+    log.info("Knowledge-base index written to %s from %s: %d bytes", path, source_dir, len(data))
+    return version
+
+
+def load_index(path: Optional[str] = None) -> KnowledgeBase:
+    """mmap the index read-only and install it as the current snapshot."""
+    global _kb
+    path = path or settings.kb_index_path
+    mapped, st = artifact.open_mapped(path)
+    _kb = KnowledgeBase(mapped, identity=(st.st_ino, st.st_size, st.st_mtime_ns), source=path)
+    log.info("Knowledge base v%d mapped from %s (%d chunks, %d terms)",
+             _kb.version, path, len(_kb), len(_kb.terms))
+    return _kb
+
+
+def _index_version(path: str) -> Optional[int]:
+    try:
+        with open(path, "rb") as f:
+            return artifact.read_version(f.read(64), magic=MAGIC, fmt=FORMAT_VERSION)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def refresh_index() -> bool:
+    """Rebuild the index if the source documents changed and remap it if the file changed."""
+    path = settings.kb_index_path
+    if _index_version(path) != _version(_source_dir()):
+        build_index(path=path)
+    st = os.stat(path)
+    if (st.st_ino, st.st_size, st.st_mtime_ns) == _kb.identity:
+        return False
+    load_index(path)
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    build_index(sys.argv[1] if len(sys.argv) > 1 else None, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,156 @@
+# gateway/app/medical_tools/monographs.py — read-through monograph cache over the drugs table
+#
+# Entries are immutable Monograph objects (name + read-only mapping) kept in a
+# size-bounded LRU. The cache is tagged with the catalog version and dropped
+# wholesale when the drugs tables change; a row read under an older version
+# is not cached. Misses look the name up through idx_drugs_name_lower.
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from .. import db
+from ..config import settings
+from .catalog import get_catalog
+
+log = logging.getLogger("gateway.monographs")
+
+_ARRAY_COLS = (
+    "brand_names", "atc_codes", "indications", "contraindications", "warnings",
+    "common_adverse_effects", "serious_adverse_effects", "reference_urls",
+)
+_TEXT_COLS = (
+    "drug_class", "mechanism", "pregnancy_category", "lactation",
+    "renal_adjustment", "hepatic_adjustment",
+)
+_SELECT = f"SELECT drug_name, {', '.join(_TEXT_COLS + _ARRAY_COLS)} FROM drugs"
+
+
+@dataclass(frozen=True, slots=True)
+class Monograph:
+    name: str
+    data: Mapping[str, Any]
+
+
+def _to_monograph(row: Mapping[str, Any]) -> Monograph:
+    data: Dict[str, Any] = {"name": row["drug_name"]}
+    for col in _TEXT_COLS:
+        data[col] = row[col]
+    for col in _ARRAY_COLS:
+        data[col] = tuple(json.loads(row[col] or "[]"))
+    return Monograph(name=row["drug_name"].lower(), data=MappingProxyType(data))
+
+
+class MonographCache:
+    """Thread-safe LRU (tools run in worker threads) with version invalidation."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Monograph]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._version = -1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_version(self) -> int:
+        version = get_catalog().version
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        return version
+
+    def _put(self, monograph: Monograph) -> None:
+        self._entries[monograph.name] = monograph
+        self._entries.move_to_end(monograph.name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{settings.database_path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def get(self, name: str) -> Optional[Monograph]:
+        key = name.lower().strip()
+        # The catalog knows every drug name, so unknown names never reach the DB.
+        if get_catalog().drug_id(key) is None:
+            return None
+        with self._lock:
+            version = self._check_version()
+            monograph = self._entries.get(key)
+            if monograph is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return monograph
+            self.misses += 1
+
+        row = self._read_conn().execute(f"{_SELECT} WHERE lower(drug_name) = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        monograph = _to_monograph(row)
+        with self._lock:
+            # The drugs tables changed while we read: the row may predate the
+            # change, so serve it to this caller but do not cache it.
+            if self._check_version() == version:
+                self._put(monograph)
+        return monograph
+
+    def warm(self, rows: Iterable[Mapping[str, Any]]) -> int:
+        with self._lock:
+            self._check_version()
+            count = 0
+            for row in rows:
+                self._put(_to_monograph(row))
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_cache = MonographCache(settings.drug_monograph_cache_size)
+
+
+def get_monograph(name: str) -> Optional[Monograph]:
+    return _cache.get(name)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+
+async def warm_cache(top_n: int) -> int:
+    """Preload the `top_n` most-prescribed drugs (then alphabetical) into the cache."""
+    async with db.connection() as conn:
+        cursor = await conn.execute(
+            f"""
+            {_SELECT} AS d
+            ORDER BY (SELECT count(*) FROM medications m
+                      WHERE lower(m.drug_name) = d.drug_name) DESC, d.drug_name
+            LIMIT ?
+            """,
+            (top_n,),
+        )
+        rows = await cursor.fetchall()
+    count = _cache.warm(rows)
+    log.info("Warmed %d drug monographs", count)
+    return count
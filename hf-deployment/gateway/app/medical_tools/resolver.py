@@ -0,0 +1,302 @@
+# gateway/app/medical_tools/resolver.py — map drug mentions to catalog ids
+#
+# Built from the catalog snapshot: every generic name and brand name becomes an
+# alias of its drug id. Exact and prefix lookups walk a character trie; typos
+# go through a SymSpell-style index (every alias with up to `max_distance`
+# characters deleted), so a lookup hashes a few dozen delete variants of the
+# query instead of comparing it against every alias. Candidates are confirmed
+# with an edit distance (adjacent transpositions count as one edit).
+#
+# Free text is held to a stricter standard than a tool argument that is known
+# to be a drug name: a word there must name an alias exactly, and typo
+# matching is only tried on longer words that sit next to a drug cue ("take
+# aspirn", "ibuprofn 400 mg") and are not everyday words. Otherwise "layer"
+# would be read as the brand "Bayer" and "aspiring" as aspirin.
+#
+# The resolver is rebuilt lazily whenever the catalog snapshot changes.
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog import DrugCatalog, get_catalog
+
+_END = ""  # trie key holding the alias that ends at a node
+_TOKEN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+MIN_PREFIX = 4  # shortest prefix resolved when it names exactly one drug
+MIN_FUZZY_MENTION = 6  # shortest free-text word tried for typos
+CUE_WINDOW = 2  # words either side of a typo candidate searched for a drug cue
+
+# Words that mark a neighbouring word as a drug name in free text.
+DRUG_CUES = frozenset(
+    "take takes taking took mg mcg ml tablet tablets pill pills capsule capsules "
+    "dose doses dosage prescribed prescription medication medications medicine "
+    "medicines drug drugs".split()
+)
+# Everyday words never read as a misspelled drug name in free text.
+PLAIN_WORDS = DRUG_CUES | frozenset(
+    "about after again against always another anything around aspiring because "
+    "before behind better between bottle breakfast cannot change cream daily "
+    "dinner doctor during either enough evening family feeling friend happen "
+    "headache health hours instead little minute minutes monday morning mother "
+    "nausea nothing number office people player please pressure really should "
+    "something sometimes stomach supper taken tomorrow travel tonight twice "
+    "unless weekly within without worried yesterday".split()
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Resolution:
+    drug_id: int
+    name: str      # canonical (generic) name
+    matched: str   # alias that matched: the generic name or a brand name
+    method: str    # "exact" | "prefix" | "fuzzy"
+    distance: int = 0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_TOKEN.findall((text or "").lower()))
+
+
+def allowed_distance(term: str) -> int:
+    """Edits tolerated for a query of this length: none for short words."""
+    n = len(term)
+    return 0 if n < 5 else 1 if n < 9 else 2
+
+
+def _deletes(term: str, depth: int) -> Set[str]:
+    out = {term}
+    frontier = {term}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it is exceeded.
+
+    Only the diagonal band |i - j| <= limit can stay within the limit, so cells
+    outside it are never computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+    over = limit + 1
+    n = len(b)
+    prev2: List[int] = []
+    prev = [j if j <= limit else over for j in range(n + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [over] * (n + 1)
+        if i <= limit:
+            cur[0] = i
+        lo, hi = max(1, i - limit), min(n, i + limit)
+        ai = a[i - 1]
+        row_min = cur[0]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (ai != b[j - 1])
+            x = prev[j] + 1
+            if x < d:
+                d = x
+            x = cur[j - 1] + 1
+            if x < d:
+                d = x
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1]:
+                x = prev2[j - 2] + 1
+                if x < d:
+                    d = x
+            cur[j] = d if d < over else over
+            if d < row_min:
+                row_min = d
+        if row_min > limit:
+            return over
+        prev2, prev = prev, cur
+    return prev[n]
+
+
+class DrugResolver:
+    """Exact, prefix and fuzzy resolution of drug names and brand names."""
+
+    def __init__(self, names: Iterable[str], aliases: Iterable[Tuple[str, int]], max_distance: int = 2) -> None:
+        self.names = list(names)
+        self.max_distance = max_distance
+        self._aliases: Dict[str, int] = {}
+        for drug_id, name in enumerate(self.names):
+            self._aliases[_normalize(name)] = drug_id
+        for alias, drug_id in aliases:
+            self._aliases.setdefault(_normalize(alias), drug_id)
+        self._aliases.pop("", None)
+        self._generic = {_normalize(name) for name in self.names}
+
+        self._trie: Dict[str, dict] = {}
+        self._deleted: Dict[str, List[str]] = {}
+        for alias in self._aliases:
+            node = self._trie
+            for ch in alias:
+                node = node.setdefault(ch, {})
+            node[_END] = alias
+            for variant in _deletes(alias, min(max_distance, allowed_distance(alias))):
+                self._deleted.setdefault(variant, []).append(alias)
+
+    @classmethod
+    def from_catalog(cls, catalog: DrugCatalog) -> "DrugResolver":
+        names = list(catalog.names)
+        aliases = [(brand, i) for i in range(len(names)) for brand in catalog.brand_names(i)]
+        return cls(names, aliases)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def _resolution(self, alias: str, method: str, distance: int = 0) -> Resolution:
+        drug_id = self._aliases[alias]
+        return Resolution(drug_id, self.names[drug_id], alias, method, distance)
+
+    def _node(self, prefix: str) -> Optional[dict]:
+        node = self._trie
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def exact(self, term: str) -> Optional[Resolution]:
+        return self._resolution(term, "exact") if term in self._aliases else None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Resolution]:
+        """Aliases starting with `prefix`, shortest first."""
+        node = self._node(prefix)
+        if node is None:
+            return []
+        found: List[str] = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _END:
+                    found.append(child)
+                else:
+                    stack.append(child)
+        found.sort(key=lambda a: (len(a), a))
+        return [self._resolution(alias, "prefix") for alias in found[:limit]]
+
+    def fuzzy(self, term: str) -> Optional[Resolution]:
+        limit = min(self.max_distance, allowed_distance(term))
+        if limit == 0:
+            return None
+        best: Optional[Tuple[int, int, str]] = None
+        seen: Set[str] = set()
+        for variant in _deletes(term, limit):
+            for alias in self._deleted.get(variant, ()):
+                if alias in seen:
+                    continue
+                seen.add(alias)
+                distance = edit_distance(term, alias, limit)
+                if distance <= limit:
+                    # Closest first, then generic names over brands, then shortest.
+                    rank = (distance, 0 if alias in self._generic else 1, alias)
+                    if best is None or rank < best:
+                        best = rank
+        return self._resolution(best[2], "fuzzy", best[0]) if best else None
+
+    def resolve(self, text: str) -> Optional[Resolution]:
+        """Best match for a single drug name as typed by a user."""
+        term = _normalize(text)
+        if not term:
+            return None
+        hit = self.exact(term)
+        if hit is not None:
+            return hit
+        if len(term) >= MIN_PREFIX:
+            completions = self.complete(term, limit=50)
+            if completions and len({c.drug_id for c in completions}) == 1:
+                return completions[0]
+        return self.fuzzy(term)
+
+    def mentions(self, text: str) -> List[Resolution]:
+        """Drugs mentioned anywhere in free text, in order, one entry per drug.
+
+        The longest alias starting at each word wins (so multi-word brand names
+        match whole). A word that matches nothing exactly is tried fuzzily only
+        when _typo_candidate() allows it; use resolve() for text that is known
+        to be a drug name.
+        """
+        tokens = _TOKEN.findall((text or "").lower())
+        found: List[Resolution] = []
+        seen: Set[int] = set()
+        i = 0
+        while i < len(tokens):
+            hit, end = self._longest_alias(tokens, i)
+            if hit is None:
+                hit, end = (self.fuzzy(tokens[i]) if _typo_candidate(tokens, i) else None), i + 1
+            if hit is not None and hit.drug_id not in seen:
+                seen.add(hit.drug_id)
+                found.append(hit)
+            i = end
+        return found
+
+    def canonicalize(self, text: str) -> Tuple[str, List[int]]:
+        """`text` as words with every exact alias replaced by its generic name,
+        and the sorted ids of the drugs named. No typo matching."""
+        tokens = _TOKEN.findall((text or "").lower())
+        words: List[str] = []
+        ids: Set[int] = set()
+        i = 0
+        while i < len(tokens):
+            hit, end = self._longest_alias(tokens, i)
+            if hit is None:
+                words.append(tokens[i])
+            else:
+                words.append(_normalize(hit.name))
+                ids.add(hit.drug_id)
+            i = end
+        return " ".join(words), sorted(ids)
+
+    def _longest_alias(self, tokens: List[str], start: int) -> Tuple[Optional[Resolution], int]:
+        node: Optional[dict] = self._trie
+        best: Tuple[Optional[Resolution], int] = (None, start + 1)
+        for j in range(start, len(tokens)):
+            if j > start:
+                node = node.get(" ")
+            for ch in tokens[j]:
+                if node is None:
+                    break
+                node = node.get(ch)
+            if node is None:
+                break
+            if _END in node:
+                best = (self._resolution(node[_END], "exact"), j + 1)
+        return best
+
+
+def _typo_candidate(tokens: List[str], i: int) -> bool:
+    word = tokens[i]
+    if len(word) < MIN_FUZZY_MENTION or not word.isalpha() or word in PLAIN_WORDS:
+        return False
+    nearby = tokens[max(0, i - CUE_WINDOW):i] + tokens[i + 1:i + 1 + CUE_WINDOW]
+    return any(t in DRUG_CUES for t in nearby)
+
+
+_lock = threading.Lock()
+_resolver: Optional[Tuple[DrugCatalog, DrugResolver]] = None
+
+
+def get_resolver(catalog: Optional[DrugCatalog] = None) -> DrugResolver:
+    """Resolver for `catalog` (default: the current snapshot), built once per snapshot."""
+    global _resolver
+    catalog = catalog or get_catalog()
+    current = _resolver
+    if current is not None and current[0] is catalog:
+        return current[1]
+    resolver = DrugResolver.from_catalog(catalog)
+    if catalog is get_catalog():
+        with _lock:
+            _resolver = (catalog, resolver)
+    return resolver
+
+
+def resolve_drug(name: str) -> Optional[Resolution]:
+    return get_resolver().resolve(name)
@@ -0,0 +1,144 @@
+# gateway/app/medical_tools/safety.py — whole-regimen medication safety check
+#
+# Evaluates every interaction pair, allergy match and drug-condition
+# contraindication for a medication list in one pass over the catalog snapshot.
+#
+# A condition matches a contraindication phrase when one is a run of whole
+# words of the other ("gi bleed" / "Active GI bleed"), never on a fragment of
+# a word: "ulcer" does not match "ulcerative colitis", "pain" not "painful".
+#
+# Regimen entries may carry a dose and frequency ("ibuprofen 400 mg"); the
+# drugs they mention are checked, and only an entry that mentions none is
+# reported as unrecognized.
+#
+# Allergies go through the drug resolver like medications do, so a brand name
+# or a misspelling ("Advil", "ibuprofin") flags the drug itself; only class
+# terms ("penicillin", "nsaid") are left to the cross-reactivity index.
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .catalog import SEVERITY_LEVELS, DrugCatalog, get_catalog
+from .resolver import DrugResolver, get_resolver
+
+_RANK = {name: code for code, name in enumerate(SEVERITY_LEVELS)}
+_KIND_ORDER = {"allergy": 0, "interaction": 1, "condition": 2}
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Ignored on both sides, so "history of asthma" still contains "asthma".
+_FILLER = frozenset("a an and or of the in on with to for".split())
+
+
+def _normalize(values: Optional[Sequence[str]]) -> List[str]:
+    return [v.lower().strip() for v in values or () if v and v.strip()]
+
+
+def _words(text: str) -> Tuple[str, ...]:
+    return tuple(w for w in _WORD.findall(text.lower()) if len(w) > 1 and w not in _FILLER)
+
+
+def _contains(words: Tuple[str, ...], part: Tuple[str, ...]) -> bool:
+    n = len(part)
+    return n > 0 and any(words[i:i + n] == part for i in range(len(words) - n + 1))
+
+
+def resolve_allergens(
+    allergies: Optional[Sequence[str]], catalog: DrugCatalog, resolver: DrugResolver,
+) -> List[Tuple[str, Optional[int], str]]:
+    """(allergen, drug id it names or None, term for catalog.cross_reactivity) per allergy.
+
+    A class term is never resolved as a drug name: "statin" is a class, not a
+    typo of some drug.
+    """
+    out: List[Tuple[str, Optional[int], str]] = []
+    for allergen in _normalize(allergies):
+        drug_id = catalog.drug_id(allergen)
+        if drug_id is None and not catalog.is_allergen_term(allergen):
+            match = resolver.resolve(allergen)
+            if match is not None:
+                out.append((allergen, match.drug_id, catalog.names[match.drug_id]))
+                continue
+        out.append((allergen, drug_id, allergen))
+    return out
+
+
+def evaluate_regimen(
+    medications: Sequence[str],
+    allergies: Optional[Sequence[str]] = None,
+    conditions: Optional[Sequence[str]] = None,
+    catalog: Optional[DrugCatalog] = None,
+) -> Dict[str, Any]:
+    """Return ranked safety findings for a full medication regimen."""
+    catalog = catalog or get_catalog()
+    resolver = get_resolver(catalog)
+    allergy_list = resolve_allergens(allergies, catalog, resolver)
+    condition_list = [(c, _words(c)) for c in _normalize(conditions)]
+
+    resolved: Dict[int, str] = {}
+    unrecognized: List[str] = []
+    for med in medications:
+        # "lisinopril 10 mg daily" is not a drug name, but it mentions one;
+        # a bare typo or prefix ("ibuprofin", "lisino") only resolve() finds.
+        matches = resolver.mentions(med)
+        if not matches:
+            match = resolver.resolve(med)
+            matches = [match] if match is not None else []
+        if not matches:
+            unrecognized.append(med)
+        for m in matches:
+            resolved.setdefault(m.drug_id, med)
+
+    findings: List[Dict[str, Any]] = []
+
+    for a, b, severity, detail_idx in catalog.interactions(resolved):
+        findings.append({
+            "kind": "interaction",
+            "severity": SEVERITY_LEVELS[severity],
+            "drugs": [catalog.names[a], catalog.names[b]],
+            **catalog.detail(detail_idx),
+        })
+
+    for drug_id in resolved:
+        name = catalog.names[drug_id]
+        for allergen, allergen_id, term in allergy_list:
+            if allergen_id == drug_id:
+                findings.append({
+                    "kind": "allergy",
+                    "severity": "contraindicated",
+                    "drugs": [name],
+                    "allergen": allergen,
+                    "reason": f"Patient allergy to {name}",
+                })
+                continue
+            shared = catalog.cross_reactivity(drug_id, term)
+            if shared:
+                findings.append({
+                    "kind": "allergy",
+                    "severity": "major",
+                    "drugs": [name],
+                    "allergen": allergen,
+                    "reason": f"Possible cross-reactivity with {allergen} allergy ({', '.join(shared)})",
+                })
+
+        for phrase in catalog.contraindications(drug_id):
+            phrase_words = _words(phrase)
+            for condition, words in condition_list:
+                if _contains(phrase_words, words) or _contains(words, phrase_words):
+                    findings.append({
+                        "kind": "condition",
+                        "severity": "major",
+                        "drugs": [name],
+                        "condition": condition,
+                        "reason": f"{name} is contraindicated: {phrase}",
+                    })
+
+    findings.sort(key=lambda f: (-_RANK[f["severity"]], _KIND_ORDER[f["kind"]]))
+    return {
+        "medications": list(medications),
+        "unrecognized": unrecognized,
+        "severity": findings[0]["severity"] if findings else "none",
+        "findings": findings,
+        "catalog_version": catalog.version,
+    }
@@ -6,6 +6,14 @@ import math
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
+from ..config import settings
+from .catalog import SEVERITY_LEVELS, get_catalog
+from .kb import get_kb
+from .monographs import get_monograph
+from .resolver import get_resolver, resolve_drug
+from .triage import get_engine
+from .safety import evaluate_regimen, resolve_allergens
+
 
 # ---------------------------------------------------------------------------
 # Patient tools
@@ -59,82 +67,78 @@ def calc_clinical_scores(age: int, sex: str, weight_kg: float,
 # Drug tools
 # ---------------------------------------------------------------------------
 
-DRUG_DB = {
-    "ibuprofen": {
-        "name": "ibuprofen", "brand_names": ["Advil", "Motrin"],
-        "drug_class": "NSAID",
-        "mechanism": "Non-selective COX inhibitor; analgesic and anti-inflammatory",
-        "indications": ["pain", "fever", "inflammation"],
-        "contraindications": ["Active GI bleed"],
-        "warnings": ["Use caution in renal or hepatic impairment"],
-        "common_adverse_effects": ["dyspepsia", "nausea", "headache"],
-        "serious_adverse_effects": ["GI bleeding", "renal failure"],
-    },
-    "warfarin": {
-        "name": "warfarin", "brand_names": ["Coumadin"],
-        "drug_class": "Vitamin K antagonist anticoagulant",
-        "mechanism": "Inhibits vitamin K epoxide reductase complex 1",
-        "indications": ["thromboembolism prevention"],
-        "contraindications": ["Pregnancy (X)", "Hemorrhagic tendencies"],
-        "common_adverse_effects": ["bleeding", "bruising"],
-        "serious_adverse_effects": ["major bleeding"],
-    },
-    "lisinopril": {
-        "name": "lisinopril", "brand_names": ["Prinivil", "Zestril"],
-        "drug_class": "ACE inhibitor",
-        "mechanism": "Inhibits ACE; reduces angiotensin II",
-        "indications": ["hypertension", "heart failure"],
-        "contraindications": ["History of angioedema related to ACE inhibitor"],
-        "common_adverse_effects": ["cough", "dizziness"],
-        "serious_adverse_effects": ["angioedema", "renal failure"],
-    },
-}
-
-
 def get_drug_info(name: str) -> Dict[str, Any]:
-    key = name.lower().strip()
-    if key in DRUG_DB:
-        return DRUG_DB[key]
+    resolved = resolve_drug(name)
+    monograph = get_monograph(resolved.name) if resolved else None
+    if monograph is not None:
+        return dict(monograph.data)
     return {
         "name": name,
-        "indications": ["information not available in demo dataset"],
+        "indications": ["information not available in the drug catalog"],
         "dosage": "Consult prescribing information",
         "adverse_effects": [],
     }
 
 
 def get_drug_interactions(drugs: List[str]) -> Dict[str, Any]:
-    drug_set = {d.lower().strip() for d in drugs}
-    if {"ibuprofen", "warfarin"} <= drug_set:
-        return {
-            "interacting_drugs": drugs,
-            "severity": "major",
-            "description": "Additive anticoagulant/platelet inhibition increases bleeding risk. Avoid combination; if necessary, close INR monitoring.",
-        }
-    if {"ibuprofen", "lisinopril"} <= drug_set:
+    catalog = get_catalog()
+    resolver = get_resolver(catalog)
+    ids = [r.drug_id for r in (resolver.resolve(d) for d in drugs) if r is not None]
+    found = catalog.interactions(ids)
+    if not found:
         return {
             "interacting_drugs": drugs,
-            "severity": "moderate",
-            "description": "NSAIDs may reduce antihypertensive effect and impair renal function. Monitor BP and renal function.",
+            "severity": "none",
+            "description": "No interactions found in the drug catalog.",
+            "interactions": [],
         }
+
+    interactions = []
+    for a, b, severity, detail_idx in found:
+        detail = catalog.detail(detail_idx)
+        interactions.append({
+            "drugs": [catalog.names[a], catalog.names[b]],
+            "severity": SEVERITY_LEVELS[severity],
+            **detail,
+        })
+    worst = interactions[0]
+    description = ". ".join(
+        part for part in (worst.get("mechanism"), worst.get("management")) if part
+    ) + "."
     return {
         "interacting_drugs": drugs,
-        "severity": "none",
-        "description": "No major interactions found in demo dataset.",
+        "severity": worst["severity"],
+        "description": description,
+        "interactions": interactions,
     }
 
 
 def get_drug_contraindications(drug: str, allergies: Optional[List[str]] = None) -> Dict[str, Any]:
+    catalog = get_catalog()
+    resolver = get_resolver(catalog)
+    resolved = resolver.resolve(drug)
+    drug_id = resolved.drug_id if resolved else None
     reasons = []
-    if allergies:
-        for a in allergies:
-            if a.lower() == drug.lower():
-                reasons.append(f"Patient allergy to {drug}")
+    for a, allergen_id, term in resolve_allergens(allergies, catalog, resolver):
+        if a == drug.lower().strip() or (drug_id is not None and allergen_id == drug_id):
+            reasons.append(f"Patient allergy to {drug}")
+        elif drug_id is not None:
+            shared = catalog.cross_reactivity(drug_id, term)
+            if shared:
+                reasons.append(f"Possible cross-reactivity with {a} allergy ({', '.join(shared)})")
     severity = "high" if reasons else "none"
     return {"drug": drug, "reasons": reasons, "severity": severity}
 
 
+def check_medication_safety(medications: List[str],
+                            allergies: Optional[List[str]] = None,
+                            conditions: Optional[List[str]] = None) -> Dict[str, Any]:
+    return evaluate_regimen(medications, allergies=allergies, conditions=conditions)
+
+
 def get_drug_alternatives(drug: str) -> List[Dict[str, str]]:
+    resolved = resolve_drug(drug)
+    drug = resolved.name if resolved else drug
     if drug.lower() == "lisinopril":
         return [
             {"drug": "Losartan", "rationale": "ARB alternative to ACE inhibitor."},
@@ -160,66 +164,16 @@ def triage_symptoms(age: int = 0, sex: str = "unknown",
 
     # If query is provided but symptoms list is empty, extract from query
     if query and not symptom_list:
-        query_lower = query.lower()
-        possible = ["chest pain", "headache", "fever", "cough", "shortness of breath",
-                     "nausea", "vomiting", "dizziness", "fatigue", "sweating",
-                     "diaphoresis", "abdominal pain", "back pain"]
-        symptom_list = [s for s in possible if s in query_lower]
+        symptom_list = get_engine().find_symptoms(query)
         if not symptom_list:
             symptom_list = [query]
 
-    s = {x.lower() for x in symptom_list}
-    rules = []
-    next_steps = []
-    acuity = "routine"
-    advice = "Monitor symptoms and schedule a routine appointment if they persist."
-
-    # Emergency rules
-    if "chest pain" in s and ("sweating" in s or "diaphoresis" in s):
-        acuity = "emergent"
-        advice = "Call emergency services immediately (911). Do not drive yourself."
-        rules = ["chest_pain_with_diaphoresis"]
-        next_steps = ["ECG within 10 minutes", "Troponin levels", "Aspirin if not contraindicated",
-                      "IV access", "Continuous monitoring"]
-    elif "chest pain" in s:
-        acuity = "urgent"
-        advice = "Seek urgent medical evaluation. Visit nearest emergency department."
-        rules = ["chest_pain"]
-        next_steps = ["ECG", "Troponin", "Chest X-ray", "Vital signs monitoring"]
-    elif "shortness of breath" in s:
-        acuity = "urgent"
-        advice = "Seek medical evaluation promptly."
-        rules = ["dyspnea"]
-        next_steps = ["Pulse oximetry", "Chest X-ray", "ABG if severe"]
-    elif "fever" in s and any(x in s for x in ["headache", "neck stiffness"]):
-        acuity = "urgent"
-        advice = "Seek urgent evaluation to rule out meningitis."
-        rules = ["fever_with_neurological"]
-        next_steps = ["LP consideration", "Blood cultures", "CT head"]
-
-    return {
-        "acuity": acuity,
-        "advice": advice,
-        "symptoms_identified": list(s),
-        "rules_matched": rules,
-        "next_steps": next_steps,
-        "disclaimer": "This is an AI-assisted triage tool. Always consult a healthcare professional.",
-    }
+    return get_engine().triage(symptom_list, age=age, sex=sex)
 
 
-def search_medical_kb(query: str, limit: int = 3) -> Dict[str, Any]:
-    hits = [
-        {"title": "Chest Pain Initial Evaluation",
-         "snippet": "Assess ACS risk, ECG within 10 minutes.",
-         "score": 0.92, "source": "Clinical Guidelines"},
-        {"title": "Hypertension Management",
-         "snippet": "Start ACE inhibitor or ARB unless contraindicated.",
-         "score": 0.83, "source": "JNC Guidelines"},
-        {"title": "Diabetes Screening",
-         "snippet": "ADA recommendations for screening and A1c targets.",
-         "score": 0.71, "source": "ADA Standards"},
-    ][:limit]
-    return {"query": query, "hits": hits}
+def search_medical_kb(query: str, limit: int = 3, mode: Optional[str] = None) -> Dict[str, Any]:
+    mode = mode or settings.kb_search_mode
+    return {"query": query, "mode": mode, "hits": get_kb().search(query, limit, mode)}
 
 
 # ---------------------------------------------------------------------------
@@ -260,6 +214,7 @@ TOOL_REGISTRY = {
     "getDrugInfo": get_drug_info,
     "getDrugInteractions": get_drug_interactions,
     "getDrugContraindications": get_drug_contraindications,
+    "checkMedicationSafety": check_medication_safety,
     "getDrugAlternatives": get_drug_alternatives,
     "triageSymptoms": triage_symptoms,
     "searchMedicalKB": search_medical_kb,
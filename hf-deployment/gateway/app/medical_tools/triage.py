@@ -0,0 +1,333 @@
+# gateway/app/medical_tools/triage.py — data-driven triage rules compiled to bitmasks
+#
+# Rules live in triage_rules.json (or settings.triage_rules_path): required
+# ("all"), any-of and excluded ("none") symptoms, optional age and sex
+# predicates, and the acuity / advice / next steps to return. At load time the
+# symptom vocabulary is numbered and every rule becomes three integer masks,
+# so checking a rule is a handful of integer ops. Rules are bucketed under one
+# of their symptoms and only buckets for symptoms actually present are looked
+# at, so adding rules for other complaints does not slow a given triage down.
+# The highest acuity wins; within an acuity the earlier rule in the file wins.
+# Free text is read with find_symptoms(), a substring scan over the vocabulary.
+#
+# triage_batch() evaluates many patients at once: symptoms become an N x S 0/1
+# matrix, one matrix product against the stacked rule masks counts required,
+# any-of and excluded hits for every (patient, rule) pair, and the age and sex
+# predicates are broadcast over the rules that have them. Rule columns are
+# kept in priority order so the winner is the first match in each row.
+# Patients are processed in chunks so the N x R intermediates stay small.
+#
+# The file is re-read when it changes on disk (checked at most every
+# triage_rules_check_seconds); a file that fails to load leaves the previous
+# rules in place.
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+log = logging.getLogger("gateway.triage")
+
+ACUITY_LEVELS = ("routine", "urgent", "emergent")
+_ACUITY_RANK = {name: rank for rank, name in enumerate(ACUITY_LEVELS)}
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "triage_rules.json")
+DEFAULT_ADVICE = "Monitor symptoms and schedule a routine appointment if they persist."
+DISCLAIMER = "This is an AI-assisted triage tool. Always consult a healthcare professional."
+
+# (symptoms, age, sex) per patient, as accepted by TriageEngine.triage
+Case = Tuple[Iterable[str], Optional[int], Optional[str]]
+_BATCH_CHUNK = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    id: str
+    order: int
+    all_mask: int
+    any_mask: int
+    none_mask: int
+    min_age: Optional[int]
+    max_age: Optional[int]
+    sex: Optional[str]
+    acuity: int
+    advice: str
+    next_steps: Tuple[str, ...]
+
+    def matches(self, present: int, age: Optional[int], sex: Optional[str]) -> bool:
+        if present & self.all_mask != self.all_mask or present & self.none_mask:
+            return False
+        if self.any_mask and not present & self.any_mask:
+            return False
+        if self.sex is not None and sex != self.sex:
+            return False
+        if self.min_age is not None or self.max_age is not None:
+            # Rules with an age bound never fire when the age is unknown.
+            if age is None:
+                return False
+            if self.min_age is not None and age < self.min_age:
+                return False
+            if self.max_age is not None and age > self.max_age:
+                return False
+        return True
+
+
+class TriageEngine:
+    """One compiled rule set: symptom vocabulary, bit assignments and rule buckets."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = "") -> None:
+        self.source = source
+        self.version = spec.get("version", 0)
+        self.vocabulary: Dict[str, Tuple[str, ...]] = {
+            name.lower().strip(): tuple(s.lower().strip() for s in synonyms)
+            for name, synonyms in (spec.get("symptoms") or {}).items()
+        }
+        self._bits: Dict[str, int] = {}
+        for raw in spec.get("rules") or ():
+            for field in ("all", "any", "none"):
+                for name in raw.get(field) or ():
+                    self.vocabulary.setdefault(name.lower().strip(), ())
+        for bit, name in enumerate(self.vocabulary):
+            self._bits[name] = bit
+            for synonym in self.vocabulary[name]:
+                self._bits.setdefault(synonym, bit)
+        self._names = list(self.vocabulary)
+        self._phrases = [(name, (name, *synonyms)) for name, synonyms in self.vocabulary.items()]
+
+        self.rules = [self._compile(order, raw) for order, raw in enumerate(spec.get("rules") or ())]
+        self._buckets: Dict[int, List[Rule]] = {}
+        self._always: List[Rule] = []
+        for rule in self.rules:
+            self._index(rule)
+        self._matrices: Optional[Dict[str, np.ndarray]] = None
+
+    def _mask(self, names: Optional[Iterable[str]]) -> int:
+        mask = 0
+        for name in names or ():
+            mask |= 1 << self._bits[name.lower().strip()]
+        return mask
+
+    def _compile(self, order: int, raw: Dict[str, Any]) -> Rule:
+        acuity = raw.get("acuity", "routine")
+        if acuity not in _ACUITY_RANK:
+            raise ValueError(f"rule {raw.get('id')!r}: unknown acuity {acuity!r}")
+        sex = raw.get("sex")
+        return Rule(
+            id=raw["id"],
+            order=order,
+            all_mask=self._mask(raw.get("all")),
+            any_mask=self._mask(raw.get("any")),
+            none_mask=self._mask(raw.get("none")),
+            min_age=raw.get("min_age"),
+            max_age=raw.get("max_age"),
+            sex=sex.lower() if sex else None,
+            acuity=_ACUITY_RANK[acuity],
+            advice=raw.get("advice", DEFAULT_ADVICE),
+            next_steps=tuple(raw.get("next_steps") or ()),
+        )
+
+    def _index(self, rule: Rule) -> None:
+        if rule.all_mask:
+            # Any required symptom will do; pick the one with the fewest rules so far.
+            bits = [b for b in range(rule.all_mask.bit_length()) if rule.all_mask >> b & 1]
+            key = min(bits, key=lambda b: len(self._buckets.get(b, ())))
+            self._buckets.setdefault(key, []).append(rule)
+        elif rule.any_mask:
+            for b in range(rule.any_mask.bit_length()):
+                if rule.any_mask >> b & 1:
+                    self._buckets.setdefault(b, []).append(rule)
+        else:
+            self._always.append(rule)
+
+    def symptom_bits(self, symptoms: Iterable[str]) -> Tuple[int, List[str]]:
+        """Bitmask of the recognised symptoms plus their canonical names."""
+        present, names = 0, []
+        for s in symptoms:
+            bit = self._bits.get(s.lower().strip())
+            if bit is not None and not present >> bit & 1:
+                present |= 1 << bit
+                names.append(self._names[bit])
+        return present, names
+
+    def find_symptoms(self, text: str) -> List[str]:
+        """Canonical names of the symptoms whose name or a synonym occurs in `text`."""
+        text = (text or "").lower()
+        return [name for name, phrases in self._phrases if any(p in text for p in phrases)]
+
+    def evaluate(self, present: int, age: Optional[int] = None, sex: Optional[str] = None) -> List[Rule]:
+        """Matching rules, highest acuity first, then file order."""
+        candidates = list(self._always)
+        bits = present
+        while bits:
+            low = bits & -bits
+            candidates.extend(self._buckets.get(low.bit_length() - 1, ()))
+            bits ^= low
+        seen = set()
+        matched = []
+        for rule in candidates:
+            if rule.order not in seen and rule.matches(present, age, sex):
+                seen.add(rule.order)
+                matched.append(rule)
+        matched.sort(key=lambda r: (-r.acuity, r.order))
+        return matched
+
+    def triage(self, symptoms: Iterable[str], age: Optional[int] = None, sex: Optional[str] = None) -> Dict[str, Any]:
+        symptoms = list(symptoms)
+        present, _ = self.symptom_bits(symptoms)
+        if age is not None and age <= 0:
+            age = None
+        sex = (sex or "").lower().strip() or None
+        matched = self.evaluate(present, age, sex)
+        top = matched[0] if matched else None
+        return {
+            "acuity": ACUITY_LEVELS[top.acuity] if top else "routine",
+            "advice": top.advice if top else DEFAULT_ADVICE,
+            "symptoms_identified": [s.lower() for s in symptoms],
+            "rules_matched": [r.id for r in matched],
+            "next_steps": list(top.next_steps) if top else [],
+            "disclaimer": DISCLAIMER,
+        }
+
+    def _rule_matrices(self) -> Dict[str, np.ndarray]:
+        """Rule masks as one S x 3R 0/1 matrix plus per-rule predicate vectors (built once).
+
+        Columns are in priority order (highest acuity, then file order), so the
+        first matching column of a row is the winning rule.
+        """
+        if self._matrices is None:
+            ranked = sorted(self.rules, key=lambda r: (-r.acuity, r.order))
+            n_rules = len(ranked)
+            masks = np.zeros((len(self._names), 3 * n_rules), dtype=np.float32)
+            for col, rule in enumerate(ranked):
+                for offset, mask in enumerate((rule.all_mask, rule.any_mask, rule.none_mask)):
+                    for b in range(mask.bit_length()):
+                        if mask >> b & 1:
+                            masks[b, offset * n_rules + col] = 1.0
+            aged = [c for c, r in enumerate(ranked) if r.min_age is not None or r.max_age is not None]
+            sexed = [c for c, r in enumerate(ranked) if r.sex is not None]
+            self._matrices = {
+                "masks": masks,
+                "all_count": masks[:, :n_rules].sum(axis=0),
+                # Rules without an any-of list need zero any-of hits.
+                "any_min": (masks[:, n_rules:2 * n_rules].sum(axis=0) > 0).astype(np.float32),
+                "order": np.array([r.order for r in ranked], dtype=np.int64),
+                "aged": np.array(aged, dtype=np.int64),
+                "min_age": np.array([-np.inf if ranked[c].min_age is None else ranked[c].min_age for c in aged]),
+                "max_age": np.array([np.inf if ranked[c].max_age is None else ranked[c].max_age for c in aged]),
+                "sexed": np.array(sexed, dtype=np.int64),
+                "sex": np.array([ranked[c].sex for c in sexed], dtype=object),
+            }
+        return self._matrices
+
+    def encode(self, cases: Sequence[Case]) -> np.ndarray:
+        """N x S 0/1 symptom matrix for `cases`."""
+        bits = self._bits
+        rows: List[int] = []
+        cols: List[int] = []
+        for i, (symptoms, _, _) in enumerate(cases):
+            for s in symptoms:
+                bit = bits.get(s)
+                if bit is None:
+                    bit = bits.get(s.lower().strip())
+                    if bit is None:
+                        continue
+                rows.append(i)
+                cols.append(bit)
+        present = np.zeros((len(cases), len(self._names)), dtype=np.float32)
+        present[rows, cols] = 1.0
+        return present
+
+    def evaluate_batch(self, cases: Sequence[Case]) -> np.ndarray:
+        """Index (into self.rules) of the winning rule per case, or -1 when none matches."""
+        winners = np.full(len(cases), -1, dtype=np.int64)
+        if not self.rules or not cases:
+            return winners
+        m = self._rule_matrices()
+        n_rules = len(self.rules)
+        for start in range(0, len(cases), _BATCH_CHUNK):
+            chunk = cases[start:start + _BATCH_CHUNK]
+            counts = self.encode(chunk) @ m["masks"]
+            ok = counts[:, :n_rules] == m["all_count"]
+            ok &= counts[:, n_rules:2 * n_rules] >= m["any_min"]
+            ok &= counts[:, 2 * n_rules:] == 0
+            if len(m["aged"]):
+                # NaN (unknown age) fails both bounds, so age-bounded rules never fire.
+                age = np.array([a if a is not None and a > 0 else np.nan for _, a, _ in chunk])[:, None]
+                ok[:, m["aged"]] &= (age >= m["min_age"]) & (age <= m["max_age"])
+            if len(m["sexed"]):
+                sex = np.array([(x or "").lower().strip() for _, _, x in chunk], dtype=object)[:, None]
+                ok[:, m["sexed"]] &= sex == m["sex"]
+            first = ok.argmax(axis=1)
+            hit = ok[np.arange(len(chunk)), first]
+            winners[start:start + len(chunk)] = np.where(hit, m["order"][first], -1)
+        return winners
+
+    def triage_batch(self, cases: Sequence[Case]) -> List[Dict[str, Any]]:
+        """Winning acuity, rule, advice and next steps per case (same order as `cases`)."""
+        outcomes = [
+            (ACUITY_LEVELS[r.acuity], r.id, r.advice, r.next_steps) for r in self.rules
+        ] + [("routine", None, DEFAULT_ADVICE, ())]  # index -1: no rule matched
+        return [
+            {"acuity": acuity, "rule": rule_id, "advice": advice, "next_steps": list(steps)}
+            for acuity, rule_id, advice, steps in map(outcomes.__getitem__, self.evaluate_batch(cases).tolist())
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "version": self.version,
+            "rules": len(self.rules),
+            "symptoms": len(self._names),
+            "buckets": len(self._buckets),
+        }
+
+
+def load_engine(path: str) -> TriageEngine:
+    with open(path, "r", encoding="utf-8") as f:
+        return TriageEngine(json.load(f), source=path)
+
+
+_lock = threading.Lock()
+_engine: Optional[TriageEngine] = None
+_identity: Optional[Tuple[int, int]] = None
+_checked_at = 0.0
+
+
+def _rules_path() -> str:
+    return settings.triage_rules_path or DEFAULT_RULES_PATH
+
+
+def get_engine() -> TriageEngine:
+    """Current rule set, reloaded if the rules file changed since the last check."""
+    global _engine, _identity, _checked_at
+    now = time.monotonic()
+    if _engine is not None and now - _checked_at < settings.triage_rules_check_seconds:
+        return _engine
+    with _lock:
+        if _engine is not None and now - _checked_at < settings.triage_rules_check_seconds:
+            return _engine
+        _checked_at = now
+        path = _rules_path()
+        try:
+            st = os.stat(path)
+            identity = (st.st_mtime_ns, st.st_size)
+            if _engine is None or identity != _identity:
+                _engine = load_engine(path)
+                _identity = identity
+                log.info("Triage rules v%s loaded from %s (%d rules)", _engine.version, path, len(_engine.rules))
+        # A file of the wrong shape (a list where an object belongs, say) fails
+        # with TypeError or AttributeError rather than ValueError.
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            if _engine is None:
+                raise
+            log.error("Keeping previous triage rules; failed to load %s: %s", path, e)
+            _identity = None if isinstance(e, OSError) else identity
+    return _engine
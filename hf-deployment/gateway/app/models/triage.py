@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TriageCaseIn(BaseModel):
+    id: Optional[str] = None
+    symptoms: List[str] = Field(default_factory=list)
+    # Free-text complaint; recognised symptoms are added to `symptoms`.
+    text: Optional[str] = None
+    age: Optional[int] = None
+    sex: Optional[str] = None
+
+
+class TriageBatchIn(BaseModel):
+    cases: List[TriageCaseIn]
+
+
+class TriageCaseOut(BaseModel):
+    id: Optional[str] = None
+    acuity: str
+    rule: Optional[str] = None
+    advice: str
+    next_steps: List[str] = []
+
+
+class TriageBatchOut(BaseModel):
+    results: List[TriageCaseOut]
+    rules_version: int | str
+    disclaimer: str
@@ -0,0 +1,10 @@
+from . import encounters, patients, users, vitals
+from .contract import Repository
+
+backend = Repository(
+    name="sqlite",
+    users=users,
+    patients=patients,
+    encounters=encounters,
+    vitals=vitals,
+)
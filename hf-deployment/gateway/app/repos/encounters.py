@@ -8,8 +8,7 @@ from .. import db
 
 
 async def create_or_get_open_encounter(patient_id: str, chief_complaint: str) -> str:
-    conn = await db.get_conn()
-    try:
+    async def _write(conn) -> str:
         cursor = await conn.execute(
             """
             SELECT id FROM encounters
@@ -22,23 +21,17 @@ async def create_or_get_open_encounter(patient_id: str, chief_complaint: str) ->
         if row:
             return str(dict(row)["id"])
 
-        await conn.execute(
+        cursor = await conn.execute(
             """
             INSERT INTO encounters (patient_id, encounter_type, status, chief_complaint)
             VALUES (?, 'chat', 'open', ?)
+            RETURNING id
             """,
             (patient_id, chief_complaint),
         )
-        await conn.commit()
+        return str((await cursor.fetchall())[0]["id"])
 
-        cursor = await conn.execute(
-            "SELECT id FROM encounters WHERE patient_id = ? AND status = 'open' ORDER BY started_at DESC LIMIT 1",
-            (patient_id,),
-        )
-        new_row = await cursor.fetchone()
-        return str(dict(new_row)["id"])
-    finally:
-        await conn.close()
+    return await db.write(_write)
 
 
 async def insert_patient_note(
@@ -50,30 +43,19 @@ async def insert_patient_note(
 ) -> str:
     safe_data = json.dumps(data or {})
 
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            """
-            INSERT INTO encounter_notes (encounter_id, author_user_id, kind, content, data)
-            VALUES (?, ?, 'patient_note', ?, ?)
-            """,
-            (encounter_id, author_user_id, content, safe_data),
-        )
-        await conn.commit()
-
-        cursor = await conn.execute(
-            "SELECT id FROM encounter_notes WHERE encounter_id = ? ORDER BY created_at DESC LIMIT 1",
-            (encounter_id,),
-        )
-        row = await cursor.fetchone()
-        return str(dict(row)["id"])
-    finally:
-        await conn.close()
+    rows = await db.execute_returning(
+        """
+        INSERT INTO encounter_notes (encounter_id, author_user_id, kind, content, data)
+        VALUES (?, ?, 'patient_note', ?, ?)
+        RETURNING id
+        """,
+        (encounter_id, author_user_id, content, safe_data),
+    )
+    return str(rows[0]["id"])
 
 
 async def fetch_latest_patient_intake_for_patient(patient_id: str) -> Optional[Dict[str, Any]]:
-    conn = await db.get_conn()
-    try:
+    async with db.connection() as conn:
         cursor = await conn.execute(
             """
             SELECT
@@ -103,5 +85,3 @@ async def fetch_latest_patient_intake_for_patient(patient_id: str) -> Optional[D
             except (json.JSONDecodeError, TypeError):
                 result["data"] = {}
         return result
-    finally:
-        await conn.close()
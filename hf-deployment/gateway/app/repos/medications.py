@@ -0,0 +1,28 @@
+# gateway/app/repos/medications.py — SQLite version
+from __future__ import annotations
+
+import json
+from typing import Dict, List
+
+from .. import db
+
+
+async def fetch_regimen_for_patient(patient_id: str) -> Dict[str, List[str]]:
+    """Active medications, allergies and conditions for a patient in one query."""
+    async with db.connection() as conn:
+        cursor = await conn.execute(
+            """
+            SELECT
+              (SELECT json_group_array(drug_name) FROM medications
+                WHERE patient_id = :pid
+                  AND (end_date IS NULL OR end_date >= date('now'))) AS medications,
+              (SELECT json_group_array(substance) FROM allergies
+                WHERE patient_id = :pid) AS allergies,
+              (SELECT json_group_array(name) FROM conditions
+                WHERE patient_id = :pid
+                  AND coalesce(status, 'active') = 'active') AS conditions
+            """,
+            {"pid": patient_id},
+        )
+        row = dict(await cursor.fetchone())
+        return {k: json.loads(v or "[]") for k, v in row.items()}
@@ -28,8 +28,7 @@ def _filter_payload(model: Any) -> Dict[str, Any]:
 
 
 async def get_patient_id_for_user(user_id: str) -> Optional[str]:
-    conn = await db.get_conn()
-    try:
+    async with db.connection() as conn:
         cursor = await conn.execute(
             "SELECT patient_id FROM patient_users WHERE user_id = ? ORDER BY linked_at LIMIT 1",
             (user_id,),
@@ -38,57 +37,80 @@ async def get_patient_id_for_user(user_id: str) -> Optional[str]:
         if not row:
             return None
         return str(dict(row)["patient_id"])
-    finally:
-        await conn.close()
 
 
-async def fetch_profile_by_patient_id(patient_id: str) -> Optional[Dict[str, Any]]:
-    conn = await db.get_conn()
-    try:
-        cursor = await conn.execute("SELECT * FROM patients WHERE id = ?", (patient_id,))
+# Mirrors v_patient_profile on the Postgres side: the whole profile is built by
+# SQLite as one JSON document. Subquery results lose their JSON subtype, hence
+# the json() wrappers; empty child lists come back as null like jsonb_agg.
+_PROFILE_SQL = """
+SELECT json_object(
+  'patient_id', p.id,
+  'external_key', NULL,
+  'mrn', p.mrn,
+  'national_id', NULL,
+  'first_name', p.first_name,
+  'middle_name', p.middle_name,
+  'last_name', p.last_name,
+  'suffix', p.suffix,
+  'date_of_birth', p.date_of_birth,
+  'sex', p.sex,
+  'email', p.email,
+  'phone', p.phone,
+  'address_line1', p.address_line1,
+  'address_line2', p.address_line2,
+  'city', p.city,
+  'state', p.state,
+  'postal_code', p.postal_code,
+  'country_code', p.country_code,
+  'pregnant', CASE WHEN p.pregnant IS NULL THEN NULL
+                   WHEN p.pregnant THEN json('true') ELSE json('false') END,
+  'breastfeeding', CASE WHEN p.breastfeeding IS NULL THEN NULL
+                        WHEN p.breastfeeding THEN json('true') ELSE json('false') END,
+  'insurance_id', p.insurance_id,
+  'risk_flags', CASE WHEN json_valid(p.risk_flags) THEN json(p.risk_flags) ELSE p.risk_flags END,
+  'conditions', json((
+      SELECT CASE WHEN count(*) THEN json_group_array(json_object(
+               'name', c.name, 'icd_code', c.icd_code,
+               'onset_date', c.onset_date, 'status', c.status)) END
+      FROM conditions c WHERE c.patient_id = p.id)),
+  'allergies', json((
+      SELECT CASE WHEN count(*) THEN json_group_array(json_object(
+               'substance', a.substance, 'reaction', a.reaction, 'severity', a.severity)) END
+      FROM allergies a WHERE a.patient_id = p.id)),
+  'medications', json((
+      SELECT CASE WHEN count(*) THEN json_group_array(json_object(
+               'drug_name', m.drug_name, 'dose', m.dose,
+               'route', m.route, 'frequency', m.frequency)) END
+      FROM medications m WHERE m.patient_id = p.id)),
+  'latest_vitals', json((
+      SELECT json_object(
+               'systolic_mmhg', v.systolic_mmhg, 'diastolic_mmhg', v.diastolic_mmhg,
+               'heart_rate_bpm', v.heart_rate_bpm, 'resp_rate_min', v.resp_rate_min,
+               'temperature_c', v.temperature_c, 'spo2_percent', v.spo2_percent,
+               'weight_kg', v.weight_kg, 'height_cm', v.height_cm, 'bmi', v.bmi,
+               'serum_creatinine', v.serum_creatinine,
+               'egfr_ml_min_1_73m2', v.egfr_ml_min_1_73m2,
+               'timestamp_utc', v.timestamp_utc)
+      FROM vitals v WHERE v.patient_id = p.id
+      ORDER BY v.timestamp_utc DESC LIMIT 1)),
+  'meta', CASE WHEN json_valid(p.meta) THEN json(p.meta) ELSE p.meta END
+) AS profile
+FROM patients p
+WHERE p.id = ?
+"""
+
+
+async def fetch_profile_json_by_patient_id(patient_id: str) -> Optional[str]:
+    """The patient profile as a ready-to-send JSON document (one query)."""
+    async with db.connection() as conn:
+        cursor = await conn.execute(_PROFILE_SQL, (patient_id,))
         row = await cursor.fetchone()
-        if not row:
-            return None
-        profile = dict(row)
-        profile["patient_id"] = profile.pop("id")
-
-        # Fetch conditions
-        cursor = await conn.execute(
-            "SELECT name, icd_code, onset_date, status FROM conditions WHERE patient_id = ?",
-            (patient_id,),
-        )
-        conditions = [dict(r) for r in await cursor.fetchall()]
-        profile["conditions"] = conditions if conditions else None
-
-        # Fetch allergies
-        cursor = await conn.execute(
-            "SELECT substance, reaction, severity FROM allergies WHERE patient_id = ?",
-            (patient_id,),
-        )
-        allergies = [dict(r) for r in await cursor.fetchall()]
-        profile["allergies"] = allergies if allergies else None
-
-        # Fetch medications
-        cursor = await conn.execute(
-            "SELECT drug_name, dose, route, frequency FROM medications WHERE patient_id = ?",
-            (patient_id,),
-        )
-        medications = [dict(r) for r in await cursor.fetchall()]
-        profile["medications"] = medications if medications else None
+        return row["profile"] if row else None
 
-        # Fetch latest vitals
-        cursor = await conn.execute(
-            """SELECT systolic_mmhg, diastolic_mmhg, heart_rate_bpm, resp_rate_min,
-                      temperature_c, spo2_percent, weight_kg, height_cm, bmi, timestamp
-               FROM vitals WHERE patient_id = ? ORDER BY timestamp DESC LIMIT 1""",
-            (patient_id,),
-        )
-        vitals_row = await cursor.fetchone()
-        profile["latest_vitals"] = dict(vitals_row) if vitals_row else None
 
-        return profile
-    finally:
-        await conn.close()
+async def fetch_profile_by_patient_id(patient_id: str) -> Optional[Dict[str, Any]]:
+    doc = await fetch_profile_json_by_patient_id(patient_id)
+    return json.loads(doc) if doc is not None else None
 
 
 async def update_patient_by_id(patient_id: str, payload: Any) -> None:
@@ -108,12 +130,7 @@ async def update_patient_by_id(patient_id: str, payload: Any) -> None:
     set_sql = ", ".join(f"{col} = ?" for col in data.keys())
     params = list(data.values()) + [patient_id]
 
-    conn = await db.get_conn()
-    try:
-        await conn.execute(f"UPDATE patients SET {set_sql} WHERE id = ?", params)
-        await conn.commit()
-    finally:
-        await conn.close()
+    await db.execute_write(f"UPDATE patients SET {set_sql} WHERE id = ?", params)
 
 
 async def create_patient_and_link(user_id: str, payload: Any) -> str:
@@ -135,31 +152,23 @@ async def create_patient_and_link(user_id: str, payload: Any) -> str:
     cols = list(data.keys())
     vals = list(data.values())
 
-    conn = await db.get_conn()
-    try:
-        placeholders = ", ".join(["?"] * len(cols))
-        col_names = ", ".join(cols)
-        await conn.execute(
-            f"INSERT INTO patients ({col_names}) VALUES ({placeholders})",
-            vals,
-        )
-        # Get the last inserted patient id
-        cursor = await conn.execute("SELECT last_insert_rowid()")
-        rowid_row = await cursor.fetchone()
+    placeholders = ", ".join(["?"] * len(cols))
+    col_names = ", ".join(cols)
 
-        # SQLite uses randomblob for id, so we need to get the actual id
+    async def _write(conn) -> str:
         cursor = await conn.execute(
-            "SELECT id FROM patients WHERE rowid = ?",
-            (dict(rowid_row)["last_insert_rowid()"],),
+            f"INSERT INTO patients ({col_names}) VALUES ({placeholders}) RETURNING id",
+            vals,
         )
-        id_row = await cursor.fetchone()
-        patient_id = dict(id_row)["id"]
+        patient_id = (await cursor.fetchall())[0]["id"]
 
         await conn.execute(
-            "INSERT OR IGNORE INTO patient_users (patient_id, user_id, role) VALUES (?, ?, 'OWNER')",
+            """
+            INSERT INTO patient_users (patient_id, user_id, role) VALUES (?, ?, 'OWNER')
+            ON CONFLICT DO NOTHING
+            """,
             (patient_id, user_id),
         )
-        await conn.commit()
         return patient_id
-    finally:
-        await conn.close()
+
+    return await db.write(_write)
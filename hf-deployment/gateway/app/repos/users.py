@@ -15,51 +15,30 @@ async def create_user(
     display_name: Optional[str] = None,
     phone: Optional[str] = None,
 ) -> dict | None:
-    conn = await db.get_conn()
-    try:
-        # Check if email exists first (SQLite INSERT OR IGNORE doesn't return)
-        cursor = await conn.execute("SELECT id FROM users WHERE email = ? COLLATE NOCASE", (email,))
-        existing = await cursor.fetchone()
-        if existing:
-            return None
-
-        await conn.execute(
-            """
-            INSERT INTO users (email, password_hash, password_algo, display_name, phone)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (email, password_hash, password_algo, display_name, phone),
-        )
-        await conn.commit()
-
-        cursor = await conn.execute(
-            "SELECT id, email, is_verified, created_at FROM users WHERE email = ? COLLATE NOCASE",
-            (email,),
-        )
-        row = await cursor.fetchone()
-        return db.row_to_dict(row)
-    finally:
-        await conn.close()
+    rows = await db.execute_returning(
+        """
+        INSERT INTO users (email, password_hash, password_algo, display_name, phone)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING
+        RETURNING id, email, is_verified, created_at
+        """,
+        (email, password_hash, password_algo, display_name, phone),
+    )
+    return rows[0] if rows else None
 
 
 async def get_user_by_email(email: str) -> dict | None:
-    conn = await db.get_conn()
-    try:
+    async with db.connection() as conn:
         cursor = await conn.execute("SELECT * FROM users WHERE email = ? COLLATE NOCASE", (email,))
         row = await cursor.fetchone()
         return db.row_to_dict(row)
-    finally:
-        await conn.close()
 
 
 async def get_user_by_id(user_id: str) -> dict | None:
-    conn = await db.get_conn()
-    try:
+    async with db.connection() as conn:
         cursor = await conn.execute("SELECT * FROM users WHERE id = ?", (user_id,))
         row = await cursor.fetchone()
         return db.row_to_dict(row)
-    finally:
-        await conn.close()
 
 
 async def insert_session(
@@ -70,32 +49,21 @@ async def insert_session(
     ip_address: Optional[str],
     user_agent: Optional[str],
 ) -> dict:
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            """
-            INSERT INTO auth_sessions (user_id, session_token_hash, ip_address, user_agent, expires_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (user_id, token_hash, ip_address, user_agent, expires_at.isoformat()),
-        )
-        await conn.commit()
-
-        cursor = await conn.execute(
-            "SELECT id, user_id, expires_at FROM auth_sessions WHERE session_token_hash = ?",
-            (token_hash,),
-        )
-        row = await cursor.fetchone()
-        if not row:
-            raise RuntimeError("Session insertion failed")
-        return db.row_to_dict(row)
-    finally:
-        await conn.close()
+    rows = await db.execute_returning(
+        """
+        INSERT INTO auth_sessions (user_id, session_token_hash, ip_address, user_agent, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+        RETURNING id, user_id, expires_at
+        """,
+        (user_id, token_hash, ip_address, user_agent, expires_at.isoformat()),
+    )
+    if not rows:
+        raise RuntimeError("Session insertion failed")
+    return rows[0]
 
 
 async def get_session_by_token_hash(token_hash: str) -> dict | None:
-    conn = await db.get_conn()
-    try:
+    async with db.connection() as conn:
         cursor = await conn.execute(
             """
             SELECT id, user_id, expires_at FROM auth_sessions
@@ -107,41 +75,24 @@ async def get_session_by_token_hash(token_hash: str) -> dict | None:
         )
         row = await cursor.fetchone()
         return db.row_to_dict(row)
-    finally:
-        await conn.close()
 
 
 async def delete_session_by_token_hash(token_hash: str) -> None:
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            "UPDATE auth_sessions SET revoked_at = datetime('now') WHERE session_token_hash = ?",
-            (token_hash,),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await db.execute_write(
+        "UPDATE auth_sessions SET revoked_at = datetime('now') WHERE session_token_hash = ?",
+        (token_hash,),
+    )
 
 
 async def update_password_hash(user_id: str, new_hash: str, algo: str = "argon2id") -> None:
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            "UPDATE users SET password_hash = ?, password_algo = ? WHERE id = ?",
-            (new_hash, algo, user_id),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await db.execute_write(
+        "UPDATE users SET password_hash = ?, password_algo = ? WHERE id = ?",
+        (new_hash, algo, user_id),
+    )
 
 
 async def revoke_all_sessions_for_user(user_id: str) -> None:
-    conn = await db.get_conn()
-    try:
-        await conn.execute(
-            "UPDATE auth_sessions SET revoked_at = datetime('now') WHERE user_id = ? AND revoked_at IS NULL",
-            (user_id,),
-        )
-        await conn.commit()
-    finally:
-        await conn.close()
+    await db.execute_write(
+        "UPDATE auth_sessions SET revoked_at = datetime('now') WHERE user_id = ? AND revoked_at IS NULL",
+        (user_id,),
+    )
@@ -0,0 +1,114 @@
+# gateway/app/repos/vitals.py — SQLite version
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .. import db
+
+
+async def list_vitals(patient_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    async with db.connection() as conn:
+        cursor = await conn.execute(
+            """
+            SELECT * FROM vitals
+            WHERE patient_id = ?
+            ORDER BY timestamp_utc DESC
+            LIMIT ?
+            """,
+            (patient_id, limit),
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def add_vital(
+    patient_id: str,
+    *,
+    timestamp_utc: str,
+    systolic_mmhg: Optional[int] = None,
+    diastolic_mmhg: Optional[int] = None,
+    heart_rate_bpm: Optional[int] = None,
+    resp_rate_min: Optional[int] = None,
+    temperature_c: Optional[float] = None,
+    spo2_percent: Optional[float] = None,
+    weight_kg: Optional[float] = None,
+    height_cm: Optional[float] = None,
+    bmi: Optional[float] = None,
+    serum_creatinine: Optional[float] = None,
+    egfr_ml_min_1_73m2: Optional[float] = None,
+) -> str:
+    rows = await db.execute_returning(
+        """
+        INSERT INTO vitals (
+          patient_id, timestamp_utc, systolic_mmhg, diastolic_mmhg,
+          heart_rate_bpm, resp_rate_min, temperature_c, spo2_percent,
+          weight_kg, height_cm, bmi, serum_creatinine, egfr_ml_min_1_73m2
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING id
+        """,
+        (
+            patient_id, timestamp_utc, systolic_mmhg, diastolic_mmhg,
+            heart_rate_bpm, resp_rate_min, temperature_c, spo2_percent,
+            weight_kg, height_cm, bmi, serum_creatinine, egfr_ml_min_1_73m2,
+        ),
+    )
+    return str(rows[0]["id"])
+
+
+async def fetch_cohort_measurements(patient_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Per patient: demographics, the latest non-null weight, height and creatinine,
+    and the id of the latest vitals row (where scores are written back).
+
+    Patients without any vitals row are left out. Each value is a separate
+    indexed lookup on (patient_id, timestamp_utc), so the cost grows with the
+    cohort, not with the vitals history.
+    """
+    where, params = "", ()
+    if patient_ids is not None:
+        if not patient_ids:
+            return []
+        where = f"WHERE p.id IN ({', '.join('?' * len(patient_ids))})"
+        params = tuple(patient_ids)
+
+    def latest(column: str) -> str:
+        return (f"(SELECT v.{column} FROM vitals v WHERE v.patient_id = p.id AND v.{column} IS NOT NULL "
+                f"ORDER BY v.timestamp_utc DESC LIMIT 1)")
+
+    async with db.connection() as conn:
+        cursor = await conn.execute(
+            f"""
+            SELECT * FROM (
+              SELECT p.id AS patient_id, p.date_of_birth, p.sex,
+                     (SELECT v.id FROM vitals v WHERE v.patient_id = p.id
+                       ORDER BY v.timestamp_utc DESC LIMIT 1) AS vitals_id,
+                     {latest("weight_kg")} AS weight_kg,
+                     {latest("height_cm")} AS height_cm,
+                     {latest("serum_creatinine")} AS serum_creatinine
+              FROM patients p
+              {where}
+            )
+            WHERE vitals_id IS NOT NULL
+            ORDER BY patient_id
+            """,
+            params,
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def update_vitals_scores(rows: Sequence[Tuple[str, Optional[float], Optional[float]]]) -> int:
+    """Bulk-write (vitals_id, bmi, egfr) in one transaction; None keeps the stored value."""
+    if not rows:
+        return 0
+
+    async def _job(conn) -> int:
+        await conn.executemany(
+            """
+            UPDATE vitals
+            SET bmi = COALESCE(?, bmi), egfr_ml_min_1_73m2 = COALESCE(?, egfr_ml_min_1_73m2)
+            WHERE id = ?
+            """,
+            [(bmi, egfr, vitals_id) for vitals_id, bmi, egfr in rows],
+        )
+        return len(rows)
+
+    return await db.write(_job)
@@ -72,7 +72,7 @@ CREATE TABLE IF NOT EXISTS patient_users (
 CREATE TABLE IF NOT EXISTS vitals (
     id               TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
     patient_id       TEXT NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
-    timestamp        TEXT NOT NULL DEFAULT (datetime('now')),
+    timestamp_utc    TEXT NOT NULL DEFAULT (datetime('now')),
     systolic_mmhg    INTEGER,
     diastolic_mmhg   INTEGER,
     heart_rate_bpm   INTEGER,
@@ -82,10 +82,11 @@ CREATE TABLE IF NOT EXISTS vitals (
     weight_kg        REAL,
     height_cm        REAL,
     bmi              REAL,
-    egfr             REAL,
+    serum_creatinine REAL,
+    egfr_ml_min_1_73m2 REAL,
     created_at       TEXT NOT NULL DEFAULT (datetime('now'))
 );
-CREATE INDEX IF NOT EXISTS idx_vitals_patient ON vitals(patient_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_vitals_patient ON vitals(patient_id, timestamp_utc);
 
 CREATE TABLE IF NOT EXISTS conditions (
     id          TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
@@ -139,3 +140,160 @@ CREATE TABLE IF NOT EXISTS encounter_notes (
     data            TEXT DEFAULT '{}',
     created_at      TEXT NOT NULL DEFAULT (datetime('now'))
 );
+
+-- Drug monographs (TEXT[] columns from PostgreSQL stored as JSON arrays)
+CREATE TABLE IF NOT EXISTS drugs (
+    id                      TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    drug_name               TEXT NOT NULL UNIQUE,
+    drug_class              TEXT,
+    mechanism               TEXT,
+    pregnancy_category      TEXT,
+    lactation               TEXT,
+    renal_adjustment        TEXT,
+    hepatic_adjustment      TEXT,
+    indications             TEXT NOT NULL DEFAULT '[]',
+    contraindications       TEXT NOT NULL DEFAULT '[]',
+    warnings                TEXT NOT NULL DEFAULT '[]',
+    common_adverse_effects  TEXT NOT NULL DEFAULT '[]',
+    serious_adverse_effects TEXT NOT NULL DEFAULT '[]',
+    brand_names             TEXT NOT NULL DEFAULT '[]',
+    atc_codes               TEXT NOT NULL DEFAULT '[]',
+    reference_urls          TEXT NOT NULL DEFAULT '[]',
+    created_at              TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at              TEXT NOT NULL DEFAULT (datetime('now'))
+);
+-- Case-insensitive name lookups (monographs.py: WHERE lower(drug_name) = ?)
+CREATE INDEX IF NOT EXISTS idx_drugs_name_lower ON drugs(lower(drug_name));
+
+-- Drug interactions (one row per unordered pair, enforced by min/max index)
+CREATE TABLE IF NOT EXISTS drug_interactions (
+    id                  TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    primary_drug_id     TEXT NOT NULL REFERENCES drugs(id) ON DELETE CASCADE,
+    interacting_drug_id TEXT NOT NULL REFERENCES drugs(id) ON DELETE CASCADE,
+    severity            TEXT NOT NULL,
+    mechanism           TEXT,
+    clinical_effect     TEXT,
+    management          TEXT,
+    reference_urls      TEXT NOT NULL DEFAULT '[]',
+    created_at          TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at          TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_drug_interactions_pair
+    ON drug_interactions (min(primary_drug_id, interacting_drug_id),
+                          max(primary_drug_id, interacting_drug_id));
+
+-- Reference data versions (bumped by triggers so in-memory copies can refresh)
+CREATE TABLE IF NOT EXISTS kb_versions (
+    name     TEXT PRIMARY KEY,
+    version  INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO kb_versions (name) VALUES ('drugs');
+
+CREATE TRIGGER IF NOT EXISTS trg_drugs_version_ins AFTER INSERT ON drugs
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+CREATE TRIGGER IF NOT EXISTS trg_drugs_version_upd AFTER UPDATE ON drugs
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+CREATE TRIGGER IF NOT EXISTS trg_drugs_version_del AFTER DELETE ON drugs
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+CREATE TRIGGER IF NOT EXISTS trg_drug_interactions_version_ins AFTER INSERT ON drug_interactions
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+CREATE TRIGGER IF NOT EXISTS trg_drug_interactions_version_upd AFTER UPDATE ON drug_interactions
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+CREATE TRIGGER IF NOT EXISTS trg_drug_interactions_version_del AFTER DELETE ON drug_interactions
+BEGIN UPDATE kb_versions SET version = version + 1 WHERE name = 'drugs'; END;
+
+-- LLM response cache (persistent tier of chat/cache.py)
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key   TEXT PRIMARY KEY,
+    intent      TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    expires_at  REAL NOT NULL,  -- unix epoch seconds
+    created_at  TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires ON llm_response_cache(expires_at);
+
+-- Seed drugs & interactions (mirrors db/20_seed.sql)
+INSERT OR IGNORE INTO drugs (drug_name, brand_names, drug_class, mechanism, atc_codes, indications,
+                             contraindications, warnings, pregnancy_category, lactation, renal_adjustment,
+                             hepatic_adjustment, common_adverse_effects, serious_adverse_effects, reference_urls)
+VALUES
+    ('ibuprofen', '["Advil","Motrin"]', 'NSAID',
+     'Non-selective COX inhibitor; analgesic and anti-inflammatory',
+     '["M01AE01"]', '["pain","fever","inflammation"]', '["Active GI bleed"]',
+     '["Use caution in renal or hepatic impairment"]',
+     'C', 'Compatible with breastfeeding; monitor infant for GI upset',
+     'Avoid in severe renal impairment', 'Use with caution',
+     '["dyspepsia","nausea","headache"]', '["GI bleeding","renal failure"]',
+     '["https://www.ncbi.nlm.nih.gov/books/NBK547742/"]'),
+    ('warfarin', '["Coumadin"]', 'Vitamin K antagonist anticoagulant',
+     'Inhibits vitamin K epoxide reductase complex 1',
+     '["B01AA03"]', '["thromboembolism prevention"]',
+     '["Pregnancy (X)","Hemorrhagic tendencies"]',
+     '["Many drug-drug and diet interactions"]',
+     'X', 'Use with caution; monitor infant',
+     'No adjustment; monitor INR closely', 'Use with caution',
+     '["bleeding","bruising"]', '["major bleeding"]',
+     '["https://www.ncbi.nlm.nih.gov/books/NBK470313/"]'),
+    ('lisinopril', '["Prinivil","Zestril"]', 'ACE inhibitor',
+     'Inhibits ACE; reduces angiotensin II',
+     '["C09AA03"]', '["hypertension","heart failure"]',
+     '["History of angioedema related to previous ACE inhibitor treatment"]',
+     '["Hyperkalemia risk, renal dysfunction"]',
+     'D', 'Use with caution',
+     'Adjust dose based on renal function', 'No adjustment',
+     '["cough","dizziness"]', '["angioedema","renal failure"]',
+     '["https://www.ncbi.nlm.nih.gov/books/NBK482230/"]'),
+    ('aspirin', '["Bayer","Ecotrin"]', 'NSAID',
+     'Irreversible COX-1/COX-2 inhibitor; antiplatelet, analgesic and antipyretic',
+     '["N02BA01","B01AC06"]', '["pain","fever","secondary prevention of cardiovascular events"]',
+     '["Active GI bleed","Children with viral illness (Reye syndrome)"]',
+     '["Increased bleeding risk with anticoagulants"]',
+     'D', 'Avoid high doses',
+     'Avoid in severe renal impairment', 'Avoid in severe hepatic impairment',
+     '["dyspepsia","bruising"]', '["GI bleeding","bronchospasm"]',
+     '[]'),
+    ('penicillin', '["Pen VK"]', 'Penicillin antibiotic',
+     'Inhibits bacterial cell wall synthesis by binding penicillin-binding proteins',
+     '["J01CE02"]', '["streptococcal pharyngitis","syphilis"]',
+     '["Penicillin hypersensitivity"]',
+     '["Cross-reactivity with other beta-lactams"]',
+     'B', 'Compatible with breastfeeding',
+     'Reduce dose in severe renal impairment', 'No adjustment',
+     '["nausea","diarrhea","rash"]', '["anaphylaxis","C. difficile colitis"]',
+     '[]'),
+    ('amoxicillin', '["Amoxil"]', 'Penicillin antibiotic',
+     'Aminopenicillin; inhibits bacterial cell wall synthesis',
+     '["J01CA04"]', '["otitis media","sinusitis","community-acquired pneumonia"]',
+     '["Penicillin hypersensitivity"]',
+     '["Rash is common with concurrent EBV infection"]',
+     'B', 'Compatible with breastfeeding',
+     'Extend dosing interval when CrCl < 30 mL/min', 'No adjustment',
+     '["diarrhea","nausea","rash"]', '["anaphylaxis","C. difficile colitis"]',
+     '[]');
+
+INSERT OR IGNORE INTO drug_interactions (primary_drug_id, interacting_drug_id, severity,
+                                         mechanism, clinical_effect, management, reference_urls)
+SELECT min(a.id, b.id), max(a.id, b.id), 'major',
+       'Additive anticoagulant/platelet inhibition increases bleeding risk',
+       'Increased INR/bleeding risk',
+       'Avoid combination; if necessary, close INR monitoring',
+       '["https://reference.medscape.com/drug-interactionchecker"]'
+FROM drugs a, drugs b WHERE a.drug_name = 'ibuprofen' AND b.drug_name = 'warfarin';
+
+INSERT OR IGNORE INTO drug_interactions (primary_drug_id, interacting_drug_id, severity,
+                                         mechanism, clinical_effect, management, reference_urls)
+SELECT min(a.id, b.id), max(a.id, b.id), 'moderate',
+       'NSAIDs may reduce antihypertensive effect and impair renal function',
+       'Attenuated BP control; risk of AKI',
+       'Monitor BP and renal function; use lowest effective NSAID dose',
+       '["https://reference.medscape.com/drug-interactionchecker"]'
+FROM drugs a, drugs b WHERE a.drug_name = 'ibuprofen' AND b.drug_name = 'lisinopril';
+
+INSERT OR IGNORE INTO drug_interactions (primary_drug_id, interacting_drug_id, severity,
+                                         mechanism, clinical_effect, management, reference_urls)
+SELECT min(a.id, b.id), max(a.id, b.id), 'major',
+       'Additive antiplatelet and anticoagulant effects',
+       'Increased bleeding risk',
+       'Avoid unless specifically indicated; monitor for bleeding',
+       '[]'
+FROM drugs a, drugs b WHERE a.drug_name = 'aspirin' AND b.drug_name = 'warfarin';
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyStat:
+    """Count/total/max since start plus a sliding window for percentiles."""
+
+    def __init__(self, window: int = 1024) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+
+        def pct(q: float) -> float:
+            return round(1000 * recent[min(len(recent) - 1, int(q * len(recent)))], 3) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "avg_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+_lock = threading.Lock()
+_latencies: Dict[str, LatencyStat] = {}
+_counters: Dict[str, int] = {}
+
+
+def observe(name: str, seconds: float) -> None:
+    with _lock:
+        stat = _latencies.get(name)
+        if stat is None:
+            stat = _latencies[name] = LatencyStat()
+        stat.observe(seconds)
+
+
+def incr(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot(prefix: Optional[str] = None) -> Dict[str, object]:
+    """Current values, optionally limited to names starting with `prefix` (stripped)."""
+    cut = len(prefix) if prefix else 0
+    with _lock:
+        out: Dict[str, object] = {
+            name[cut:]: value for name, value in _counters.items()
+            if not prefix or name.startswith(prefix)
+        }
+        out.update({
+            name[cut:]: stat.snapshot() for name, stat in _latencies.items()
+            if not prefix or name.startswith(prefix)
+        })
+    return out
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..config import settings
+from ..deps import get_current_user
+from ..medical_tools.triage import DISCLAIMER, get_engine
+from ..models.triage import TriageBatchIn, TriageBatchOut, TriageCaseIn
+from ..telemetry import metrics
+
+router = APIRouter()
+
+
+def _run_batch(cases: List[TriageCaseIn]) -> Dict[str, Any]:
+    engine = get_engine()
+    encoded = []
+    for case in cases:
+        symptoms = list(case.symptoms)
+        if case.text:
+            symptoms += engine.find_symptoms(case.text)
+        encoded.append((symptoms, case.age, case.sex))
+    results = engine.triage_batch(encoded)
+    for case, result in zip(cases, results):
+        result["id"] = case.id
+    return {"results": results, "rules_version": engine.version, "disclaimer": DISCLAIMER}
+
+
+@router.post("/batch", response_model=TriageBatchOut)
+async def triage_batch(payload: TriageBatchIn, user=Depends(get_current_user)):
+    """Rule-based acuity for many patients at once; no LLM involved."""
+    if len(payload.cases) > settings.triage_batch_max_cases:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.triage_batch_max_cases} cases per request",
+        )
+    started = time.perf_counter()
+    out = await asyncio.to_thread(_run_batch, payload.cases)
+    metrics.observe("triage.batch", time.perf_counter() - started)
+    metrics.incr("triage.batch_cases", len(payload.cases))
+    return out